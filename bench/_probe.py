@@ -0,0 +1,43 @@
+"""
+Cold-start probe, run by cold_start.py in a fresh interpreter per handler.
+
+Deliberately imports nothing beyond sys/time before the handler
+module, so the measured init time is what the handler itself pulls in.
+
+Usage: python _probe.py <module> <events.json> <result.json> <invocations>
+
+events.json holds a list of events; invocation i gets events[i % len(events)].
+"""
+import sys
+import time
+
+module_name, event_path, result_path, invocations = sys.argv[1:5]
+
+start = time.perf_counter()
+module = __import__(module_name)  # not importlib: -X importtime only traces __import__
+init_ms = (time.perf_counter() - start) * 1000
+
+import json  # noqa: E402  (after the timed import on purpose)
+import types  # noqa: E402
+
+with open(event_path, encoding="utf-8") as fh:
+    events = json.load(fh)
+
+context = types.SimpleNamespace(
+    function_name=module_name,
+    aws_request_id="bench",
+    memory_limit_in_mb=128,
+    get_remaining_time_in_millis=lambda: 30000,
+)
+
+invoke_ms = []
+status_codes = []
+for i in range(int(invocations)):
+    payload = json.loads(json.dumps(events[i % len(events)]))  # handlers may mutate the event
+    start = time.perf_counter()
+    response = module.lambda_handler(payload, context)
+    invoke_ms.append((time.perf_counter() - start) * 1000)
+    status_codes.append(response.get("statusCode") if isinstance(response, dict) else response)
+
+with open(result_path, "w", encoding="utf-8") as fh:
+    json.dump({"init_ms": init_ms, "invoke_ms": invoke_ms, "status_codes": status_codes}, fh)
@@ -0,0 +1,225 @@
+"""
+Cold-start and import-time benchmark for the Lambda handlers.
+
+Every handler is measured in fresh interpreters against the local DynamoDB/SQS
+stand-in (local_aws.py):
+
+- importtime_ms: cumulative `python -X importtime` total of the handler module
+- init_ms:       wall time of the module import, i.e. module-level init
+- first_ms:      first invocation latency (cold: lazy client/connection setup)
+- warm_ms:       median of the following invocations
+
+Each metric is the median over --runs fresh interpreters and is checked
+against the per-handler budgets in budgets.json; the script exits non-zero
+when any handler is over budget or any invocation returns a 5xx/"Error"
+(an error short-circuit is not a meaningful timing).
+
+Usage:
+    python bench/cold_start.py [--runs 3] [--invocations 5] [--only create_user ...]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from local_aws import LocalAWS
+from events import api_gateway_event, ddb_stream_event, ddb_stream_record, sample_users, sqs_event
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+PROBE = os.path.join(BENCH_DIR, "_probe.py")
+DEFAULT_BUDGETS = os.path.join(BENCH_DIR, "budgets.json")
+
+TABLE_NAME = "UsersDataDefination-bench"
+ORDERS_TABLE_NAME = "UsersOrders-bench"
+QUEUE_NAME = "UserInsertQueue-bench"
+IDEMPOTENCY_TABLE_NAME = "UserApiIdempotency-bench"
+METRICS = ("importtime_ms", "init_ms", "first_ms", "warm_ms")
+
+# Each builder takes a sequence number unique across runs and invocations, so
+# handlers that deduplicate (bulk_create_user, worker_lambda) do real work on
+# every warm call instead of replaying a cached response.
+HANDLER_EVENTS = {
+    "create_user": lambda n: api_gateway_event({"name": "bench", "email": "bench@example.com"}),
+    "get_user": lambda n: api_gateway_event(path_parameters={"id": "user-1"}, method="GET"),
+    "delete_user": lambda n: api_gateway_event(path_parameters={"id": "user-1"}, method="DELETE"),
+    "bulk_create_user": lambda n: api_gateway_event({"users": sample_users(50, prefix=f"bulk{n}")}, path="/user/bulk",
+                                                    headers={"Idempotency-Key": f"bench-{n}"}),
+    "parallel_task": lambda n: api_gateway_event({"users": sample_users(50, prefix=f"par{n}")}, path="/user/parallel"),
+    "multi_process": lambda n: api_gateway_event({"users": sample_users(50, prefix=f"mp{n}")},
+                                                 path="/user/parallel_process"),
+    "worker_lambda": lambda n: sqs_event([[{"id": f"worker{n}-{i}", **user}
+                                           for i, user in enumerate(sample_users(25, prefix=f"worker{n}"))]]),
+    "DDBEvenHandler": lambda n: ddb_stream_event([
+        ddb_stream_record("INSERT", {"ddw_key": "k1", "tab_name": "PI-SPI"},
+                          new_image={"ddw_key": "k1", "tab_name": "PI-SPI", "current_version": "1.0"}),
+        ddb_stream_record("MODIFY", {"ddw_key": "k1", "tab_name": "PI-SPI"},
+                          new_image={"ddw_key": "k1", "tab_name": "PI-SPI", "current_version": "1.1"},
+                          old_image={"ddw_key": "k1", "tab_name": "PI-SPI", "current_version": "1.0"}),
+    ]),
+}
+
+# create_user writes a fixed order item keyed on userId/recordTypeId
+HANDLER_ENV = {
+    "create_user": {"TABLE_NAME": ORDERS_TABLE_NAME},
+}
+
+
+def parse_importtime(stderr: str, module: str) -> tuple:
+    """Return (cumulative ms of `module`, [(self ms, name), ...] heaviest first)."""
+    cumulative_ms, entries = None, []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        entries.append((int(self_us) / 1000, name))
+        if name == module:
+            cumulative_ms = int(cumulative_us) / 1000
+    entries.sort(reverse=True)
+    return cumulative_ms, entries
+
+
+def run_probe(module: str, env: dict, event_path: str, invocations: int, importtime: bool) -> dict:
+    with tempfile.NamedTemporaryFile("r", suffix=".json") as result:
+        command = [sys.executable]
+        if importtime:
+            command += ["-X", "importtime"]
+        command += [PROBE, module, event_path, result.name, str(invocations)]
+        proc = subprocess.run(command, env=env, cwd=BENCH_DIR, capture_output=True, text=True, timeout=300)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{module} probe failed:\n{proc.stderr[-2000:]}")
+        measured = json.load(result)
+    measured["stderr"] = proc.stderr
+    return measured
+
+
+def write_events(module: str, first: int, count: int) -> str:
+    """Write `count` distinct events (at least one) for `module`; returns the file path."""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as fh:
+        json.dump([HANDLER_EVENTS[module](first + i) for i in range(max(count, 1))], fh)
+        return fh.name
+
+
+def measure(module: str, env: dict, runs: int, invocations: int) -> dict:
+    samples = {metric: [] for metric in METRICS}
+    heaviest, status_codes = [], []
+    for run in range(runs):
+        event_path = write_events(module, run * invocations, invocations)
+        try:
+            traced = run_probe(module, env, event_path, 0, importtime=True)
+            cumulative_ms, entries = parse_importtime(traced["stderr"], module)
+            samples["importtime_ms"].append(cumulative_ms or 0.0)
+            heaviest = entries[:5]
+
+            timed = run_probe(module, env, event_path, invocations, importtime=False)
+            samples["init_ms"].append(timed["init_ms"])
+            samples["first_ms"].append(timed["invoke_ms"][0])
+            if len(timed["invoke_ms"]) > 1:
+                samples["warm_ms"].append(statistics.median(timed["invoke_ms"][1:]))
+            status_codes += timed["status_codes"]
+        finally:
+            os.unlink(event_path)
+
+    result = {metric: statistics.median(values) for metric, values in samples.items() if values}
+    result["heaviest_imports"] = heaviest
+    result["status_codes"] = sorted(set(status_codes), key=str)
+    return result
+
+
+def load_budgets(path: str) -> dict:
+    with open(path, encoding="utf-8") as fh:
+        config = json.load(fh)
+    default = config.get("default", {})
+    return {
+        module: {**default, **config.get("handlers", {}).get(module, {})}
+        for module in HANDLER_EVENTS
+    }
+
+
+def is_error(status) -> bool:
+    """A 5xx response or the stream handlers' "Error" return value."""
+    return status == "Error" or (isinstance(status, int) and status >= 500)
+
+
+def check_status(result: dict) -> list:
+    errors = [status for status in result["status_codes"] if is_error(status)]
+    return [f"handler returned {', '.join(map(str, errors))}; timings are of the error path"] if errors else []
+
+
+def check_budget(result: dict, budget: dict, scale: float) -> list:
+    return [
+        f"{metric} {result[metric]:.1f}ms > budget {limit * scale:.1f}ms"
+        for metric, limit in budget.items()
+        if metric in result and result[metric] > limit * scale
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per handler")
+    parser.add_argument("--invocations", type=int, default=5, help="invocations per interpreter")
+    parser.add_argument("--budgets", default=DEFAULT_BUDGETS, help="budget file (JSON)")
+    parser.add_argument("--scale", type=float, default=float(os.environ.get("BENCH_BUDGET_SCALE", 1.0)),
+                        help="multiply every budget, e.g. for slower CI runners")
+    parser.add_argument("--only", nargs="*", choices=sorted(HANDLER_EVENTS), help="handlers to measure")
+    parser.add_argument("--json", dest="json_out", help="also write results to this file")
+    args = parser.parse_args()
+
+    budgets = load_budgets(args.budgets)
+    modules = args.only or list(HANDLER_EVENTS)
+    results, failures = {}, {}
+
+    with LocalAWS() as service:
+        service.create_table(TABLE_NAME)
+        service.create_table(ORDERS_TABLE_NAME, "userId", "recordTypeId")
+        service.create_table(IDEMPOTENCY_TABLE_NAME)
+        env = {
+            **os.environ,
+            **service.env(),
+            "TABLE_NAME": TABLE_NAME,
+            "QUEUE_URL": service.create_queue(QUEUE_NAME),
+            "IDEMPOTENCY_TABLE": IDEMPOTENCY_TABLE_NAME,
+            "PYTHONPATH": os.pathsep.join([
+                os.path.join(REPO_ROOT, "lambda"),
+                os.path.join(REPO_ROOT, "shared"),
+            ]),
+        }
+
+        header = f"{'handler':<18}" + "".join(f"{metric:>15}" for metric in METRICS) + "  status"
+        print(header)
+        print("-" * len(header))
+        for module in modules:
+            result = measure(module, {**env, **HANDLER_ENV.get(module, {})}, args.runs, args.invocations)
+            results[module] = result
+            print(f"{module:<18}" + "".join(
+                f"{result.get(metric, float('nan')):>15.1f}" for metric in METRICS
+            ) + f"  {','.join(map(str, result['status_codes']))}")
+            over = check_status(result) + check_budget(result, budgets[module], args.scale)
+            if over:
+                failures[module] = over
+
+    print()
+    for module in modules:
+        heaviest = ", ".join(f"{name} {ms:.1f}ms" for ms, name in results[module]["heaviest_imports"])
+        print(f"{module}: heaviest imports (self): {heaviest}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump({"results": results, "failures": failures}, fh, indent=2)
+
+    if failures:
+        print("\n❌ Cold-start budget exceeded or handler failed:")
+        for module, over in failures.items():
+            for line in over:
+                print(f"  {module}: {line}")
+        return 1
+    print("\n✅ All handlers within cold-start budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
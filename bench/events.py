@@ -0,0 +1,86 @@
+"""
+Builders for the Lambda event shapes the handlers in lambda/ receive.
+"""
+import json
+import time
+import uuid
+
+from boto3.dynamodb.types import TypeSerializer
+
+serializer = TypeSerializer()
+
+ACCOUNT_ID = "000000000000"
+REGION = "us-east-2"
+
+
+def api_gateway_event(body=None, path_parameters=None, method="POST", path="/user", headers=None) -> dict:
+    """API Gateway REST (proxy integration) event."""
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": {"Content-Type": "application/json", **(headers or {})},
+        "queryStringParameters": None,
+        "pathParameters": path_parameters,
+        "requestContext": {
+            "requestId": str(uuid.uuid4()),
+            "stage": "dev",
+            "requestTimeEpoch": int(time.time() * 1000),
+        },
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def sqs_event(bodies: list, queue_name: str = "UserInsertQueue") -> dict:
+    """SQS event source mapping event; each body is JSON-encoded."""
+    return {
+        "Records": [
+            {
+                "messageId": str(uuid.uuid4()),
+                "receiptHandle": str(uuid.uuid4()),
+                "body": body if isinstance(body, str) else json.dumps(body),
+                "attributes": {
+                    "ApproximateReceiveCount": "1",
+                    "SentTimestamp": str(int(time.time() * 1000)),
+                },
+                "messageAttributes": {},
+                "eventSource": "aws:sqs",
+                "eventSourceARN": f"arn:aws:sqs:{REGION}:{ACCOUNT_ID}:{queue_name}",
+                "awsRegion": REGION,
+            }
+            for body in bodies
+        ]
+    }
+
+
+def ddb_stream_record(event_name: str, keys: dict, new_image: dict = None, old_image: dict = None,
+                      table_name: str = "UsersDataEntry") -> dict:
+    """One DynamoDB stream record (NEW_AND_OLD_IMAGES) from plain Python dicts."""
+    dynamodb = {
+        "ApproximateCreationDateTime": int(time.time()),
+        "Keys": {key: serializer.serialize(value) for key, value in keys.items()},
+        "SequenceNumber": str(uuid.uuid4().int)[:21],
+        "StreamViewType": "NEW_AND_OLD_IMAGES",
+    }
+    if new_image is not None:
+        dynamodb["NewImage"] = {key: serializer.serialize(value) for key, value in new_image.items()}
+    if old_image is not None:
+        dynamodb["OldImage"] = {key: serializer.serialize(value) for key, value in old_image.items()}
+    return {
+        "eventID": uuid.uuid4().hex,
+        "eventName": event_name,
+        "eventVersion": "1.1",
+        "eventSource": "aws:dynamodb",
+        "awsRegion": REGION,
+        "dynamodb": dynamodb,
+        "eventSourceARN": f"arn:aws:dynamodb:{REGION}:{ACCOUNT_ID}:table/{table_name}/stream/bench",
+    }
+
+
+def ddb_stream_event(records: list) -> dict:
+    return {"Records": records}
+
+
+def sample_users(count: int, prefix: str = "user") -> list:
+    return [{"name": f"{prefix}-{i}", "email": f"{prefix}-{i}@example.com"} for i in range(count)]
@@ -0,0 +1,243 @@
+"""
+In-process load test of the bulk ingestion pipeline:
+
+    API Gateway -> bulk_create_user -> SQS -> worker_lambda -> table stream -> DDBEvenHandler
+
+All three handlers are imported into this process and invoked on thread pools
+against the local DynamoDB/SQS stand-in (local_aws.py). API requests are
+generated open-loop at --rate per second; SQS messages and stream records are
+picked up as soon as the previous stage produces them, in batches of the same
+size as the event source mappings in template.yaml, and handed to the next
+handler -- so the stages overlap the way they do when deployed.
+
+The worker table gets a stream in the stand-in so the chain is complete; in
+template.yaml the stream is on UsersDataEntry instead.
+
+Per stage it reports invocations, errors, throughput and p50/p95/p99 handler
+latency, plus the largest backlog seen between stages.
+
+Note that concurrent "executions" share one module instance here (caches,
+metric buffers, clients), unlike separate Lambda execution environments.
+
+Usage:
+    python bench/load_test.py --rate 20 --duration 10 --users-per-request 50 --concurrency 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from local_aws import LocalAWS
+from events import api_gateway_event, ddb_stream_event, sample_users, sqs_event
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+TABLE_NAME = "UsersDataDefination-load"
+QUEUE_NAME = "UserInsertQueue-load"
+IDEMPOTENCY_TABLE = "UserApiIdempotency-load"
+
+
+class Stage:
+    """Thread pool invoking one handler, with latency/error bookkeeping."""
+
+    def __init__(self, name: str, handler, concurrency: int):
+        self.name = name
+        self.handler = handler
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=name)
+        self.latencies = []
+        self.errors = 0
+        self.in_flight = 0
+        self.max_backlog = 0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def submit(self, event: dict):
+        with self._lock:
+            self.in_flight += 1
+            if self.started is None:
+                self.started = time.perf_counter()
+        self.executor.submit(self._invoke, event)
+
+    def _invoke(self, event: dict):
+        start = time.perf_counter()
+        failed = False
+        try:
+            response = self.handler(event, None)
+            status = response.get("statusCode") if isinstance(response, dict) else None
+            failed = ((isinstance(status, int) and status >= 400) or response == "Error"
+                      or bool(isinstance(response, dict) and response.get("batchItemFailures")))
+        except Exception:  # pylint: disable=broad-except
+            failed = True
+        end = time.perf_counter()
+        with self._lock:
+            self.latencies.append((end - start) * 1000)
+            self.errors += failed
+            self.in_flight -= 1
+            self.finished = end
+
+    @property
+    def busy(self) -> bool:
+        with self._lock:
+            return self.in_flight > 0
+
+    def saturated(self) -> bool:
+        with self._lock:
+            return self.in_flight >= self.executor._max_workers
+
+    def report(self) -> dict:
+        with self._lock:
+            samples = sorted(self.latencies)
+        count = len(samples)
+        elapsed = (self.finished - self.started) if count else 0.0
+        if count >= 2:
+            cuts = statistics.quantiles(samples, n=100, method="inclusive")
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        else:
+            p50 = p95 = p99 = samples[0] if samples else 0.0
+        return {
+            "invocations": count,
+            "errors": self.errors,
+            "throughput_per_sec": count / elapsed if elapsed else 0.0,
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+            "max_backlog": self.max_backlog,
+        }
+
+
+def load_handlers(env: dict) -> dict:
+    os.environ.update(env)
+    sys.path[:0] = [os.path.join(REPO_ROOT, "lambda"), os.path.join(REPO_ROOT, "shared")]
+    import bulk_create_user  # pylint: disable=import-outside-toplevel
+    import worker_lambda  # pylint: disable=import-outside-toplevel
+    import DDBEvenHandler  # pylint: disable=import-outside-toplevel
+    return {
+        "api": bulk_create_user.lambda_handler,
+        "sqs": worker_lambda.lambda_handler,
+        "stream": DDBEvenHandler.lambda_handler,
+    }
+
+
+def run(args) -> dict:
+    with LocalAWS(latency_ms=args.latency_ms, write_capacity=args.write_capacity) as service:
+        service.create_table(TABLE_NAME, stream=True)
+        service.create_table(IDEMPOTENCY_TABLE)
+        env = {
+            **service.env(),
+            "TABLE_NAME": TABLE_NAME,
+            "QUEUE_URL": service.create_queue(QUEUE_NAME),
+        }
+        if args.idempotency:
+            env["IDEMPOTENCY_TABLE"] = IDEMPOTENCY_TABLE
+        handlers = load_handlers(env)
+
+        api = Stage("api", handlers["api"], args.api_concurrency or args.concurrency)
+        sqs = Stage("sqs", handlers["sqs"], args.sqs_concurrency or args.concurrency)
+        stream = Stage("stream", handlers["stream"], args.stream_concurrency or args.concurrency)
+
+        total_requests = int(args.rate * args.duration)
+        producing = True
+
+        def produce():
+            nonlocal producing
+            start = time.perf_counter()
+            for i in range(total_requests):
+                delay = start + i / args.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                users = sample_users(args.users_per_request, prefix=f"r{i}")
+                api.submit(api_gateway_event({"users": users}, path="/user/bulk",
+                                             headers={"Idempotency-Key": f"load-{i}"}))
+            producing = False
+
+        quiet = io.StringIO() if not args.verbose else None
+        wall_start = time.perf_counter()
+        with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+            producer = threading.Thread(target=produce, name="producer")
+            producer.start()
+            while True:
+                queued = service.backlog(queue_name=QUEUE_NAME)
+                sqs.max_backlog = max(sqs.max_backlog, queued)
+                while queued and not sqs.saturated():
+                    messages = service.take_messages(QUEUE_NAME, args.sqs_batch_size)
+                    if not messages:
+                        break
+                    sqs.submit(sqs_event([message["Body"] for message in messages], QUEUE_NAME))
+                    queued -= len(messages)
+
+                pending = service.backlog(table_name=TABLE_NAME)
+                stream.max_backlog = max(stream.max_backlog, pending)
+                while pending and not stream.saturated():
+                    records = service.take_stream_records(TABLE_NAME, args.stream_batch_size)
+                    if not records:
+                        break
+                    stream.submit(ddb_stream_event(records))
+                    pending -= len(records)
+
+                idle = not (producing or api.busy or sqs.busy or stream.busy)
+                if idle and not service.backlog(queue_name=QUEUE_NAME) \
+                        and not service.backlog(table_name=TABLE_NAME):
+                    break
+                time.sleep(0.005)
+            producer.join()
+        wall = time.perf_counter() - wall_start
+
+        for stage in (api, sqs, stream):
+            stage.executor.shutdown(wait=True)
+
+        return {
+            "config": vars(args),
+            "stages": {stage.name: stage.report() for stage in (api, sqs, stream)},
+            "items_written": len(service.tables[TABLE_NAME].items),
+            "wall_time_sec": wall,
+            "end_to_end_items_per_sec": len(service.tables[TABLE_NAME].items) / wall if wall else 0.0,
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=10.0, help="API requests per second")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of API traffic")
+    parser.add_argument("--users-per-request", type=int, default=25)
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent executions per stage")
+    parser.add_argument("--api-concurrency", type=int)
+    parser.add_argument("--sqs-concurrency", type=int)
+    parser.add_argument("--stream-concurrency", type=int)
+    parser.add_argument("--sqs-batch-size", type=int, default=1, help="SQS messages per worker invocation")
+    parser.add_argument("--stream-batch-size", type=int, default=100, help="stream records per invocation")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="stand-in service latency per call")
+    parser.add_argument("--write-capacity", type=float, help="stand-in item writes/sec before throttling")
+    parser.add_argument("--no-idempotency", dest="idempotency", action="store_false",
+                        help="run without the idempotency table")
+    parser.add_argument("--verbose", action="store_true", help="keep handler output")
+    parser.add_argument("--json", dest="json_out", help="also write results to this file")
+    args = parser.parse_args()
+
+    result = run(args)
+
+    header = f"{'stage':<8}{'invocations':>12}{'errors':>8}{'per sec':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'backlog':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, stage in result["stages"].items():
+        print(f"{name:<8}{stage['invocations']:>12}{stage['errors']:>8}{stage['throughput_per_sec']:>10.1f}"
+              f"{stage['p50_ms']:>10.1f}{stage['p95_ms']:>10.1f}{stage['p99_ms']:>10.1f}{stage['max_backlog']:>9}")
+    print(f"\n{result['items_written']} items written in {result['wall_time_sec']:.2f}s "
+          f"({result['end_to_end_items_per_sec']:.0f} items/s end to end)")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,578 @@
+"""
+Local DynamoDB/SQS stand-in for benchmarks and load tests.
+
+Serves the subset of the DynamoDB and SQS JSON protocols that the handlers in
+lambda/ use, over plain HTTP on localhost. Point boto3 at it with the
+AWS_ENDPOINT_URL environment variable (see LocalAWS.env()), so the real boto3
+and botocore code paths -- serialization, signing, connection setup -- are
+exercised exactly as they are in Lambda, without touching AWS.
+
+Run standalone:
+    python bench/local_aws.py --port 4566 --table Users --queue UserInsertQueue
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ACCOUNT_ID = "000000000000"
+REGION = "us-east-2"
+
+
+class ServiceError(Exception):
+    """Error returned to the client as a JSON protocol error response."""
+
+    def __init__(self, code: str, message: str, status: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+
+def _key_of(item: dict, key_names: list) -> tuple:
+    try:
+        return tuple(json.dumps(item[name], sort_keys=True) for name in key_names)
+    except KeyError as exc:
+        raise ServiceError(
+            "ValidationException",
+            f"One of the required keys was not given a value: {exc.args[0]}",
+        ) from exc
+
+
+def _size(item: dict) -> int:
+    return len(json.dumps(item)) if item else 0
+
+
+def _write_units(item: dict) -> int:
+    return max(1, -(-_size(item) // 1024))
+
+
+def _read_units(size: int) -> float:
+    return max(1, -(-size // 4096)) * 0.5  # eventually consistent
+
+
+def _consumed_capacity(operation: str, payload: dict, response: dict):
+    """Approximate ConsumedCapacity the way DynamoDB bills it (1KB writes, 4KB reads)."""
+    if operation == "BatchWriteItem":
+        unprocessed = response.get("UnprocessedItems", {})
+        consumed = []
+        for table_name, requests in payload["RequestItems"].items():
+            skipped = len(unprocessed.get(table_name, []))
+            done = requests[:len(requests) - skipped] if skipped else requests
+            units = sum(_write_units(request.get("PutRequest", {}).get("Item")) for request in done)
+            consumed.append({"TableName": table_name, "CapacityUnits": float(units)})
+        return consumed
+    if operation in ("PutItem", "DeleteItem"):
+        units = _write_units(payload.get("Item"))
+    elif operation == "GetItem":
+        units = _read_units(_size(response.get("Item")))
+    elif operation in ("Query", "Scan"):
+        units = _read_units(sum(_size(item) for item in response.get("Items", [])))
+    else:
+        return None
+    return {"TableName": payload["TableName"], "CapacityUnits": float(units)}
+
+
+def _resolve_name(token: str, names: dict) -> str:
+    token = token.strip()
+    return names.get(token, token) if token.startswith("#") else token
+
+
+def _compare_value(attribute: dict):
+    kind, value = next(iter(attribute.items()))
+    return float(value) if kind == "N" else value
+
+
+def _condition_holds(expression: str, item: dict, names: dict, values: dict) -> bool:
+    """
+    Evaluate a flat ConditionExpression: clauses joined by OR/AND (no
+    parentheses), each attribute_exists(a), attribute_not_exists(a) or
+    `a <op> :v` with op in =, <>, <, <=, >, >=.
+    """
+    def clause(text):
+        text = text.strip()
+        for func, expected in (("attribute_not_exists", False), ("attribute_exists", True)):
+            if text.startswith(func):
+                return (_resolve_name(text[text.index("(") + 1:text.rindex(")")], names) in item) == expected
+        for op in ("<>", "<=", ">=", "=", "<", ">"):
+            if op in text:
+                attr, placeholder = text.split(op, 1)
+                attr = _resolve_name(attr, names)
+                if attr not in item:
+                    return False
+                left, right = _compare_value(item[attr]), _compare_value(values[placeholder.strip()])
+                return {
+                    "<>": left != right, "<=": left <= right, ">=": left >= right,
+                    "=": left == right, "<": left < right, ">": left > right,
+                }[op]
+        raise ServiceError("ValidationException", f"Unsupported condition: {text}")
+
+    return any(
+        all(clause(part) for part in alternative.split(" AND "))
+        for alternative in expression.split(" OR ")
+    )
+
+
+def _check_condition(payload: dict, existing):
+    expression = payload.get("ConditionExpression")
+    if expression and not _condition_holds(
+        expression, existing or {},
+        payload.get("ExpressionAttributeNames", {}), payload.get("ExpressionAttributeValues", {}),
+    ):
+        raise ServiceError("ConditionalCheckFailedException", "The conditional request failed")
+
+
+class LocalTable:
+    """
+    In-memory table keyed by its hash (and optional range) attribute.
+
+    With stream=True every change is also appended to `self.stream` as a
+    NEW_AND_OLD_IMAGES stream record, ready to hand to a stream handler.
+    """
+
+    def __init__(self, name: str, hash_key: str = "id", range_key: str = None, stream: bool = False):
+        self.name = name
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.items = OrderedDict()
+        self.stream = [] if stream else None
+        self._sequence = 0
+
+    @property
+    def key_names(self) -> list:
+        return [self.hash_key] + ([self.range_key] if self.range_key else [])
+
+    def describe(self) -> dict:
+        key_schema = [{"AttributeName": self.hash_key, "KeyType": "HASH"}]
+        if self.range_key:
+            key_schema.append({"AttributeName": self.range_key, "KeyType": "RANGE"})
+        return {
+            "TableName": self.name,
+            "TableStatus": "ACTIVE",
+            "KeySchema": key_schema,
+            "AttributeDefinitions": [
+                {"AttributeName": entry["AttributeName"], "AttributeType": "S"}
+                for entry in key_schema
+            ],
+            "ItemCount": len(self.items),
+        }
+
+    def put(self, item: dict):
+        key = _key_of(item, self.key_names)
+        old = self.items.get(key)
+        self.items[key] = item
+        self._record("MODIFY" if old is not None else "INSERT", item, new=item, old=old)
+
+    def get(self, key: dict):
+        return self.items.get(_key_of(key, self.key_names))
+
+    def delete(self, key: dict):
+        old = self.items.pop(_key_of(key, self.key_names), None)
+        if old is not None:
+            self._record("REMOVE", old, old=old)
+        return old
+
+    def _record(self, event_name: str, item: dict, new: dict = None, old: dict = None):
+        if self.stream is None:
+            return
+        self._sequence += 1
+        dynamodb = {
+            "ApproximateCreationDateTime": int(time.time()),
+            "Keys": {name: item[name] for name in self.key_names},
+            "SequenceNumber": str(self._sequence).zfill(21),
+            "SizeBytes": _size(new or old),
+            "StreamViewType": "NEW_AND_OLD_IMAGES",
+        }
+        if new is not None:
+            dynamodb["NewImage"] = new
+        if old is not None:
+            dynamodb["OldImage"] = old
+        self.stream.append({
+            "eventID": uuid.uuid4().hex,
+            "eventName": event_name,
+            "eventVersion": "1.1",
+            "eventSource": "aws:dynamodb",
+            "awsRegion": REGION,
+            "dynamodb": dynamodb,
+            "eventSourceARN": f"arn:aws:dynamodb:{REGION}:{ACCOUNT_ID}:table/{self.name}/stream/local",
+        })
+
+
+class LocalAWS:
+    """
+    Threaded HTTP server holding in-memory DynamoDB tables and SQS queues.
+
+    Args:
+        port: Port to bind on 127.0.0.1; 0 picks a free port.
+        latency_ms: Artificial per-request service latency.
+        write_capacity: Item writes per second across all tables before
+            writes are throttled (None: unlimited). Throttled BatchWriteItem
+            calls return UnprocessedItems, or ProvisionedThroughputExceeded
+            when nothing at all could be written.
+    """
+
+    def __init__(self, port: int = 0, latency_ms: float = 0.0, write_capacity: float = None):
+        self.port = port
+        self.latency_ms = latency_ms
+        self.write_capacity = write_capacity
+        self._write_tokens = write_capacity or 0.0
+        self._tokens_at = time.monotonic()
+        self.tables = {}
+        self.queues = {}
+        self.request_counts = {}
+        self.lock = threading.RLock()
+        self._server = None
+        self._thread = None
+
+    # -- lifecycle -----------------------------------------------------------
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> "LocalAWS":
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="LocalAWS", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def env(self) -> dict:
+        """Environment variables that route boto3 to this stand-in."""
+        return {
+            "AWS_ENDPOINT_URL": self.endpoint,
+            "AWS_ACCESS_KEY_ID": "local",
+            "AWS_SECRET_ACCESS_KEY": "local",
+            "AWS_SESSION_TOKEN": "local",
+            "AWS_DEFAULT_REGION": REGION,
+            "AWS_REGION": REGION,
+        }
+
+    # -- fixtures ------------------------------------------------------------
+
+    def create_table(self, name: str, hash_key: str = "id", range_key: str = None,
+                     stream: bool = False) -> LocalTable:
+        with self.lock:
+            table = self.tables.setdefault(name, LocalTable(name, hash_key, range_key, stream))
+        return table
+
+    def create_queue(self, name: str) -> str:
+        with self.lock:
+            self.queues.setdefault(name, OrderedDict())
+        return self.queue_url(name)
+
+    def queue_url(self, name: str) -> str:
+        return f"{self.endpoint}/{ACCOUNT_ID}/{name}"
+
+    # -- event source mappings -------------------------------------------------
+
+    def take_messages(self, queue_name: str, max_messages: int) -> list:
+        """Remove and return up to max_messages queued messages (SQS event source)."""
+        with self.lock:
+            queue = self.queues[queue_name]
+            ids = [mid for mid, message in queue.items() if not message.get("inflight")][:max_messages]
+            return [queue.pop(mid) for mid in ids]
+
+    def take_stream_records(self, table_name: str, max_records: int) -> list:
+        """Remove and return up to max_records stream records (stream event source)."""
+        with self.lock:
+            stream = self.tables[table_name].stream
+            records = stream[:max_records]
+            del stream[:max_records]
+            return records
+
+    def backlog(self, queue_name: str = None, table_name: str = None) -> int:
+        with self.lock:
+            if queue_name:
+                return len(self.queues[queue_name])
+            return len(self.tables[table_name].stream)
+
+    # -- dispatch ------------------------------------------------------------
+
+    def dispatch(self, target: str, payload: dict) -> dict:
+        service, _, operation = target.partition(".")
+        handler = getattr(self, f"_{'ddb' if service.startswith('DynamoDB') else 'sqs'}_{operation}", None)
+        if handler is None:
+            raise ServiceError("UnknownOperationException", f"Unsupported operation {target}")
+        with self.lock:
+            self.request_counts[operation] = self.request_counts.get(operation, 0) + 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        response = handler(payload)
+        if payload.get("ReturnConsumedCapacity") in ("TOTAL", "INDEXES"):
+            consumed = _consumed_capacity(operation, payload, response)
+            if consumed is not None:
+                response["ConsumedCapacity"] = consumed
+        return response
+
+    def _grant_writes(self, wanted: int) -> int:
+        """Take up to `wanted` write tokens from the bucket; caller holds the lock."""
+        if self.write_capacity is None:
+            return wanted
+        now = time.monotonic()
+        self._write_tokens = min(
+            self.write_capacity,
+            self._write_tokens + (now - self._tokens_at) * self.write_capacity,
+        )
+        self._tokens_at = now
+        granted = min(wanted, int(self._write_tokens))
+        self._write_tokens -= granted
+        if not granted:
+            self.request_counts["Throttled"] = self.request_counts.get("Throttled", 0) + 1
+            raise ServiceError(
+                "ProvisionedThroughputExceededException",
+                "The level of configured provisioned throughput for the table was exceeded.",
+            )
+        return granted
+
+    def _table(self, name: str) -> LocalTable:
+        table = self.tables.get(name)
+        if table is None:
+            raise ServiceError("ResourceNotFoundException", f"Requested resource not found: Table: {name} not found")
+        return table
+
+    # -- DynamoDB ------------------------------------------------------------
+
+    def _ddb_CreateTable(self, payload):
+        hash_key = range_key = None
+        for entry in payload["KeySchema"]:
+            if entry["KeyType"] == "HASH":
+                hash_key = entry["AttributeName"]
+            else:
+                range_key = entry["AttributeName"]
+        return {"TableDescription": self.create_table(payload["TableName"], hash_key, range_key).describe()}
+
+    def _ddb_DescribeTable(self, payload):
+        return {"Table": self._table(payload["TableName"]).describe()}
+
+    def _ddb_PutItem(self, payload):
+        with self.lock:
+            table = self._table(payload["TableName"])
+            self._grant_writes(1)
+            _check_condition(payload, table.get(payload["Item"]))
+            table.put(payload["Item"])
+        return {}
+
+    def _ddb_GetItem(self, payload):
+        with self.lock:
+            item = self._table(payload["TableName"]).get(payload["Key"])
+        return {"Item": item} if item is not None else {}
+
+    def _ddb_DeleteItem(self, payload):
+        with self.lock:
+            table = self._table(payload["TableName"])
+            self._grant_writes(1)
+            _check_condition(payload, table.get(payload["Key"]))
+            old = table.delete(payload["Key"])
+        if payload.get("ReturnValues") == "ALL_OLD" and old is not None:
+            return {"Attributes": old}
+        return {}
+
+    def _ddb_BatchWriteItem(self, payload):
+        request_items = payload["RequestItems"]
+        if sum(len(requests) for requests in request_items.values()) > 25:
+            raise ServiceError(
+                "ValidationException",
+                "Too many items requested for the BatchWriteItem call",
+            )
+        # like DynamoDB, validate the whole batch before writing any of it
+        for table_name, requests in request_items.items():
+            table = self._table(table_name)
+            keys = [
+                _key_of(request["PutRequest"]["Item"] if "PutRequest" in request
+                        else request["DeleteRequest"]["Key"], table.key_names)
+                for request in requests
+            ]
+            if len(set(keys)) != len(keys):
+                raise ServiceError("ValidationException", "Provided list of item keys contains duplicates")
+        unprocessed = {}
+        with self.lock:
+            granted = self._grant_writes(sum(len(requests) for requests in request_items.values()))
+            for table_name, requests in request_items.items():
+                table = self._table(table_name)
+                for request in requests:
+                    if not granted:
+                        unprocessed.setdefault(table_name, []).append(request)
+                        continue
+                    granted -= 1
+                    if "PutRequest" in request:
+                        table.put(request["PutRequest"]["Item"])
+                    else:
+                        table.delete(request["DeleteRequest"]["Key"])
+        return {"UnprocessedItems": unprocessed}
+
+    def _ddb_Query(self, payload):
+        table = self._table(payload["TableName"])
+        names = payload.get("ExpressionAttributeNames", {})
+        values = payload.get("ExpressionAttributeValues", {})
+        conditions = []
+        for clause in payload["KeyConditionExpression"].split(" AND "):
+            clause = clause.strip()
+            if clause.lower().startswith("begins_with"):
+                attr, placeholder = clause[clause.index("(") + 1:clause.rindex(")")].split(",")
+                prefix = next(iter(values[placeholder.strip()].values()))
+                conditions.append((_resolve_name(attr, names), "begins_with", prefix))
+            else:
+                attr, placeholder = clause.split("=")
+                conditions.append((_resolve_name(attr, names), "=", values[placeholder.strip()]))
+
+        def matches(item):
+            for attr, op, expected in conditions:
+                if attr not in item:
+                    return False
+                if op == "=" and item[attr] != expected:
+                    return False
+                if op == "begins_with" and not next(iter(item[attr].values())).startswith(expected):
+                    return False
+            return True
+
+        with self.lock:
+            rows = [item for item in table.items.values() if matches(item)]
+        return self._page(table, rows, payload, names)
+
+    def _ddb_Scan(self, payload):
+        table = self._table(payload["TableName"])
+        with self.lock:
+            rows = list(table.items.values())
+        return self._page(table, rows, payload, payload.get("ExpressionAttributeNames", {}))
+
+    def _page(self, table: LocalTable, rows: list, payload: dict, names: dict) -> dict:
+        start = payload.get("ExclusiveStartKey")
+        if start is not None:
+            start_key = _key_of(start, table.key_names)
+            keys = [_key_of(row, table.key_names) for row in rows]
+            rows = rows[keys.index(start_key) + 1:] if start_key in keys else []
+        limit = payload.get("Limit")
+        page = rows[:limit] if limit else rows
+        response = {"Count": len(page), "ScannedCount": len(page)}
+        if limit and len(rows) > limit:
+            response["LastEvaluatedKey"] = {name: page[-1][name] for name in table.key_names}
+        projection = payload.get("ProjectionExpression")
+        if projection:
+            fields = [_resolve_name(token, names) for token in projection.split(",")]
+            page = [{field: row[field] for field in fields if field in row} for row in page]
+        response["Items"] = page
+        return response
+
+    # -- SQS -----------------------------------------------------------------
+
+    def _queue(self, url: str) -> OrderedDict:
+        queue = self.queues.get(url.rstrip("/").rsplit("/", 1)[-1])
+        if queue is None:
+            raise ServiceError("AWS.SimpleQueueService.NonExistentQueue", f"Queue {url} does not exist")
+        return queue
+
+    def _sqs_CreateQueue(self, payload):
+        return {"QueueUrl": self.create_queue(payload["QueueName"])}
+
+    def _sqs_GetQueueUrl(self, payload):
+        if payload["QueueName"] not in self.queues:
+            raise ServiceError("AWS.SimpleQueueService.NonExistentQueue", "The specified queue does not exist.")
+        return {"QueueUrl": self.queue_url(payload["QueueName"])}
+
+    def _sqs_SendMessage(self, payload):
+        message_id = str(uuid.uuid4())
+        with self.lock:
+            self._queue(payload["QueueUrl"])[message_id] = {
+                "MessageId": message_id,
+                "ReceiptHandle": message_id,
+                "Body": payload["MessageBody"],
+                "Attributes": {"SentTimestamp": str(int(time.time() * 1000))},
+            }
+        return {"MessageId": message_id}
+
+    def _sqs_ReceiveMessage(self, payload):
+        limit = payload.get("MaxNumberOfMessages", 1)
+        with self.lock:
+            queue = self._queue(payload["QueueUrl"])
+            messages = [message for message in queue.values() if not message.get("inflight")][:limit]
+            for message in messages:
+                message["inflight"] = True
+        return {
+            "Messages": [
+                {key: value for key, value in message.items() if key != "inflight"}
+                for message in messages
+            ]
+        }
+
+    def _sqs_DeleteMessage(self, payload):
+        with self.lock:
+            self._queue(payload["QueueUrl"]).pop(payload["ReceiptHandle"], None)
+        return {}
+
+
+def _make_handler(service: LocalAWS):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # keep-alive plus separate header/body writes would otherwise stall on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b"{}"
+            target = self.headers.get("X-Amz-Target", "")
+            try:
+                status, body = 200, service.dispatch(target, json.loads(raw or b"{}"))
+            except ServiceError as exc:
+                status, body = exc.status, {"__type": exc.code, "message": exc.message}
+            except (KeyError, ValueError) as exc:
+                status, body = 400, {"__type": "ValidationException", "message": str(exc)}
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/x-amz-json-1.0")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("x-amzn-RequestId", str(uuid.uuid4()))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=4566)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--write-capacity", type=float, default=None, help="item writes per second")
+    parser.add_argument("--table", action="append", default=[], help="name[:hash_key[:range_key]]")
+    parser.add_argument("--queue", action="append", default=[])
+    args = parser.parse_args()
+
+    service = LocalAWS(port=args.port, latency_ms=args.latency_ms, write_capacity=args.write_capacity).start()
+    for spec in args.table:
+        name, *keys = spec.split(":")
+        service.create_table(name, *keys)
+    for name in args.queue:
+        service.create_queue(name)
+    print(f"Local DynamoDB/SQS stand-in listening on {service.endpoint}")
+    for key, value in service.env().items():
+        print(f"export {key}={value}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 import json
 import logging
+import os
 from functools import wraps
 from boto3.dynamodb.types import TypeDeserializer
 from contextlib import contextmanager
 import inspect
+from mylib.metrics import metrics
 
 # Setup basic logger
 logger = logging.getLogger()
@@ -12,6 +14,9 @@ logger.setLevel(logging.INFO)
 # Initialize deserializer
 deserializer = TypeDeserializer()
 
+# Hash key of the table whose stream feeds this handler
+PARTITION_KEY = os.environ.get('PARTITION_KEY', 'ddw_key')
+
 
 def deserialize_ddb_image(ddb_image):
     """Convert DynamoDB AttributeValue dict to Python dict."""
@@ -29,7 +34,8 @@ def event_processing(event_name):
     """
     logger.info(f"Start processing event: {event_name}")
     try:
-        yield
+        with metrics.timer(f"{event_name}Latency"):
+            yield
         logger.info(f"Finished processing event: {event_name}")
     except Exception as exc:
         logger.error(f"Exception during event '{event_name}': {exc}")
@@ -125,6 +131,7 @@ def add_history_record(payload):
 
 
 # Lambda function handler with decorator
+@metrics.handler
 @log_event_handler
 def lambda_handler(event, context):
     logger.info("📦 Received event: %s", json.dumps(event))
@@ -132,6 +139,9 @@ def lambda_handler(event, context):
     try:
         for record in event.get('Records', []):
             event_name = record.get('eventName')
+            partition_value = record.get('dynamodb', {}).get('Keys', {}).get(PARTITION_KEY)
+            if partition_value:
+                metrics.add_partition_key(deserializer.deserialize(partition_value))
             with event_processing(event_name):
                 if event_name == 'INSERT':
                     handle_insert(record)
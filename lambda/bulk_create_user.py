@@ -1,9 +1,12 @@
 """Lambda function to bulk create users in DynamoDB."""
 import json
-import uuid
 import os
 import boto3
-from botocore.exceptions import BotoCoreError
+from botocore.exceptions import BotoCoreError, ClientError
+from mylib.idempotency import (
+    IdempotencyInProgress, IdempotencyKeyReused, IdempotencyStore, deterministic_id, header, payload_hash,
+)
+from mylib.metrics import metrics
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(os.environ['TABLE_NAME'])
@@ -11,33 +14,63 @@ table = dynamodb.Table(os.environ['TABLE_NAME'])
 sqs = boto3.client('sqs')
 QUEUE_URL = os.environ['QUEUE_URL']
 
+idempotency = IdempotencyStore(os.environ.get('IDEMPOTENCY_TABLE'))
+
+
+@metrics.handler
 def lambda_handler(event: dict, _context: dict) -> dict:
-    """Handle bulk user creation from API Gateway event."""
+    """
+    Handle bulk user creation from API Gateway event.
+
+    Retries are safe: send the same Idempotency-Key header (or
+    "idempotency_key" body field) and the original 202 response is replayed
+    without queueing the users again. User IDs are derived from that key and
+    the user's content, so even a duplicate that does get through overwrites
+    the same rows instead of adding new ones.
+    """
     try:
         body = json.loads(event['body'])
         users = body.get('users', [])
-        # Validate and add IDs
-        valid_users = [
-            {
-                "id": str(uuid.uuid4()),
-                "name": user["name"],
-                "email": user["email"]
-            }
-            for user in users
-            if isinstance(user.get("name"), str) and "@" in user.get("email", "")
-        ]
+        idempotency_key = header(event, 'Idempotency-Key') or body.get('idempotency_key')
 
-        # Send one message with all users
-        sqs.send_message(
-            QueueUrl=QUEUE_URL,
-            MessageBody=json.dumps(valid_users)
-        )
+        # Validate and add deterministic IDs (duplicates within the request collapse)
+        by_id = {}
+        for user in users:
+            if isinstance(user.get("name"), str) and "@" in user.get("email", ""):
+                content = {"name": user["name"], "email": user["email"]}
+                user_id = deterministic_id(idempotency_key, content)
+                by_id[user_id] = {"id": user_id, **content}
+        valid_users = list(by_id.values())
 
+        def queue_users():
+            metrics.put('UsersQueued', len(valid_users))
+            # Send one message with all users
+            sqs.send_message(
+                QueueUrl=QUEUE_URL,
+                MessageBody=json.dumps(valid_users)
+            )
+            return {
+                "statusCode": 202,
+                "body": json.dumps({"message": f"{len(valid_users)} users queued for background processing"})
+            }
+
+        record_id = f"bulk_create_user#{idempotency_key or payload_hash(valid_users)}"
+        response, replayed = idempotency.run(record_id, valid_users, queue_users)
+        if replayed:
+            metrics.put('IdempotentReplays', 1)
+            response = {**response, "headers": {"Idempotent-Replayed": "true"}}
+        return response
+    except IdempotencyInProgress:
+        return {
+            'statusCode': 409,
+            'body': json.dumps({'error': 'A request with this idempotency key is still being processed'})
+        }
+    except IdempotencyKeyReused:
         return {
-            "statusCode": 202,
-            "body": json.dumps({"message": f"{len(valid_users)} users queued for background processing"})
+            'statusCode': 422,
+            'body': json.dumps({'error': 'Idempotency key was already used with a different payload'})
         }
-    except (json.JSONDecodeError, KeyError, BotoCoreError) as exc:
+    except (json.JSONDecodeError, KeyError, BotoCoreError, ClientError) as exc:
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(exc)})
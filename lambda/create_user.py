@@ -10,11 +10,13 @@ import uuid
 import boto3
 from decimal import Decimal
 from botocore.exceptions import ClientError
+from mylib.metrics import metrics
 
-dynamodb = boto3.resource('dynamodb')
+dynamodb = metrics.instrument(boto3.resource('dynamodb'))
 table = dynamodb.Table(os.environ['TABLE_NAME'])
 
 
+@metrics.handler
 def lambda_handler(event: dict, _context: dict) -> dict:
     """
     Handles the creation of a user in DynamoDB.
@@ -84,7 +86,7 @@ def lambda_handler(event: dict, _context: dict) -> dict:
 
         return {
             'statusCode': 201,
-            'body': json.dumps(item)
+            'body': json.dumps(item, default=str)
         }
 
     except (json.JSONDecodeError, ClientError) as error:
@@ -3,53 +3,106 @@ This module provides an AWS Lambda function to delete a user from a DynamoDB tab
 Functions:
     lambda_handler(event: dict, _context: dict) -> dict:
         Handles Lambda events to delete a user by ID from the DynamoDB table specified by the TABLE_NAME environment variable.
+        With a JSON body it deletes in bulk instead:
+            {"keys": [{...}, ...]}       delete exactly these primary keys
+            {"partition_key": "<value>"} delete every item in that partition
 Environment Variables:
     TABLE_NAME: The name of the DynamoDB table from which users will be deleted.
 """
+import json
 import os
-from multiprocessing import Process, Pipe
-from mylib.utils import my_function_ml_procs
+from decimal import Decimal
+from mylib.bulk_writer import delete_keys
+from mylib.metrics import metrics
+from mylib.process_pool import chunked, get_pool
+from mylib.utils import my_function_ml_batch
 import boto3
+from botocore.exceptions import BotoCoreError, ClientError
 
 
-dynamodb = boto3.resource('dynamodb')
+dynamodb = metrics.instrument(boto3.resource('dynamodb'))
 table = dynamodb.Table(os.environ['TABLE_NAME'])
 
+POOL_SIZE = int(os.environ.get('POOL_SIZE', 4))
+QUERY_PAGE_SIZE = 1000
 
 
-def run_parallel_with_processes(numbers: list) -> list:
-    processes = []
-    conns = []
 
-    print(f"Creating {len(numbers)} processes...")
-
-    for num in numbers:
-        parent_conn, child_conn = Pipe()
-        p = Process(target=my_function_ml_procs, args=(num, child_conn))
-        processes.append((p, parent_conn))
-        conns.append(parent_conn)
-        p.start()
+def run_parallel_with_processes(numbers: list, chunk_size: int = 10) -> list:
+    # Reuse the warm worker pool instead of forking one process per number
+    pool = get_pool('delete_user', size=POOL_SIZE)
+    chunks = chunked(numbers, chunk_size)
+    print(f"Dispatching {len(numbers)} numbers in {len(chunks)} chunks to {pool.size} workers...")
 
     results = []
-
-    for (p, conn) in processes:
-        p.join(timeout=30)  # wait 30 seconds
-        if p.is_alive():
-            p.terminate()
-            results.append({"error": f"Process {p.pid} timed out"})
+    for chunk, outcome in zip(chunks, pool.map(my_function_ml_batch, chunks, timeout=30)):
+        if isinstance(outcome, dict) and "error" in outcome:
+            results.extend({"input": num, **outcome} for num in chunk)
         else:
-            try:
-                if conn.poll():
-                    results.append(conn.recv())
-                else:
-                    results.append({"error": f"No data received from process {p.pid}"})
-            except Exception as e:
-                results.append({"error": f"Exception while receiving from process {p.pid}: {str(e)}"})
-        conn.close()
-
+            results.extend(outcome)
     return results
 
 
+def key_attributes() -> list:
+    # table.key_schema is loaded once (DescribeTable) and cached on the resource
+    return [entry['AttributeName'] for entry in table.key_schema]
+
+
+def partition_keys(partition_value) -> list:
+    """Collect the primary keys of every item in a partition (key-only, paginated Query)."""
+    names = {f"#k{i}": name for i, name in enumerate(key_attributes())}
+    query = {
+        'KeyConditionExpression': '#k0 = :pk',
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': {':pk': partition_value},
+        'ProjectionExpression': ', '.join(names),
+        'Limit': QUERY_PAGE_SIZE,
+    }
+    keys = []
+    while True:
+        response = table.query(**query)
+        keys.extend(response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            return keys
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def bulk_delete(body: dict) -> dict:
+    """Delete a list of keys or a whole partition with concurrent BatchWriteItem calls."""
+    if 'keys' in body:
+        keys = body['keys']
+        required = set(key_attributes())
+        if not isinstance(keys, list) or not all(isinstance(key, dict) and set(key) == required for key in keys):
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'error': f"'keys' must be a list of objects with exactly {sorted(required)}"})
+            }
+    else:
+        partition_value = body['partition_key']
+        valid = (isinstance(partition_value, str) and partition_value) or (
+            isinstance(partition_value, (int, Decimal)) and not isinstance(partition_value, bool))
+        if not valid:
+            return {
+                'statusCode': 400,
+                'body': json.dumps({'error': "'partition_key' must be a non-empty string or a number"})
+            }
+        keys = partition_keys(partition_value)
+
+    # DynamoDB rejects a batch that names the same key twice
+    unique = list({json.dumps(key, sort_keys=True, default=str): key for key in keys}.values())
+    result = delete_keys(table.name, unique, key_attrs=key_attributes())
+    result.update(requested=len(keys), duplicates=len(keys) - len(unique))
+    print(f"Bulk delete: {result['processed']}/{len(unique)} processed, {result['throttles']} throttles")
+
+    status_code = 200 if not result['failed'] else 207 if result['processed'] else 500
+    return {
+        'statusCode': status_code,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps(result, default=str)
+    }
+
+
+@metrics.handler
 def lambda_handler(event: dict, _context: dict) -> dict:
     """
     AWS Lambda handler to delete a user from DynamoDB table.
@@ -61,7 +114,26 @@ def lambda_handler(event: dict, _context: dict) -> dict:
     Returns:
         dict: HTTP response with status code.
     """
-    
+    try:
+        body = json.loads(event.get('body') or '{}', parse_float=Decimal)
+    except json.JSONDecodeError as exc:
+        return {'statusCode': 400, 'body': json.dumps({'error': str(exc)})}
+    if not isinstance(body, dict):
+        return {'statusCode': 400, 'body': json.dumps({'error': 'Request body must be a JSON object'})}
+
+    if 'keys' in body or 'partition_key' in body:
+        try:
+            return bulk_delete(body)
+        except (BotoCoreError, ClientError) as exc:
+            return {'statusCode': 500, 'body': json.dumps({'error': str(exc)})}
+
+    user_id = (event.get('pathParameters') or {}).get('id')
+    if not user_id:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': "Expected /user/{id}, or a body with 'keys' or 'partition_key'"})
+        }
+
     my_numbers = list(range(2, 101, 2))
     
     try:
@@ -71,7 +143,6 @@ def lambda_handler(event: dict, _context: dict) -> dict:
         print(f"Error in multiprocessing: {e}")
         process_results = []
     
-    user_id = event['pathParameters']['id']
     print(f"Deleting user with ID: {user_id}")
     table.delete_item(Key={'id': user_id})
     return {'statusCode': 204}
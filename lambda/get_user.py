@@ -19,10 +19,12 @@ import requests
 import boto3
 from botocore.exceptions import BotoCoreError, ClientError
 from mylib.utils import my_function
+from mylib.metrics import metrics
 import threading
 from queue import Queue
 
 
+@metrics.handler
 def lambda_handler(event: dict, _context: dict) -> dict:
     """
     AWS Lambda handler to get a user by ID from DynamoDB.
@@ -33,13 +35,14 @@ def lambda_handler(event: dict, _context: dict) -> dict:
 
     my_number = [i for i in range(2, 101, 2)]
     
-    for num in my_number:
-        thread = threading.Thread(target=my_function, args=(num, output_queue))
-        _thread.append(thread)
-        thread.start()
-        
-    for thread in _thread:
-        thread.join()
+    with metrics.timer('ThreadFanOutLatency'):
+        for num in my_number:
+            thread = threading.Thread(target=my_function, args=(num, output_queue))
+            _thread.append(thread)
+            thread.start()
+
+        for thread in _thread:
+            thread.join()
     
     thread_results = []
     while not output_queue.empty():
@@ -58,7 +61,7 @@ def lambda_handler(event: dict, _context: dict) -> dict:
             'headers': {'Content-Type': 'application/json'}
         }
 
-    dynamodb = boto3.resource('dynamodb')
+    dynamodb = metrics.instrument(boto3.resource('dynamodb'))
     table = dynamodb.Table(table_name)
 
     user_id = event.get('pathParameters', {}).get('id')
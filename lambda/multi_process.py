@@ -2,91 +2,96 @@ import json
 import os
 import uuid
 import time
-import boto3
-from multiprocessing import Process, Pipe
+from decimal import Decimal
+from mylib.bulk_writer import get_client, write_items
+from mylib.process_pool import chunked, get_pool
+from mylib.metrics import metrics
 
 
-# Split data into chunks
-def chunk_data(data, batch_size=10):
-    for i in range(0, len(data), batch_size):
-        yield data[i:i + batch_size]
+TABLE_NAME = os.environ['TABLE_NAME']
+POOL_SIZE = int(os.environ.get('POOL_SIZE', 4))
+CHUNK_SIZE = 100  # four 25-item BatchWriteItem requests per task
+WRITE_MODE = os.environ.get('WRITE_MODE', 'processes')  # "processes" or "async"
 
-# Worker function run in a separate process
-def insert_batch(batch, conn, process_id):
-    dynamodb = boto3.resource('dynamodb')
-    table = dynamodb.Table(os.environ['TABLE_NAME'])
-    
-    start_time = time.time()
-    try:
-        with table.batch_writer() as writer:
-            for item in batch:
-                if "id" not in item:
-                    item["id"] = str(uuid.uuid4())
-                writer.put_item(Item=item)
 
-        duration = time.time() - start_time
-        log = {
-            "process_id": process_id,
-            "count": len(batch),
-            "duration": round(duration, 2),
-            "data": batch
-        }
-        conn.send(log)
-    except Exception as e:
-        conn.send({"process_id": process_id, "error": str(e)})
-    finally:
-        conn.close()
+# Worker function, runs inside a pooled process with that process's own client
+def insert_chunk(batch, write=None):
+    start_time = time.time()
+    if write is None:
+        result = write_items(TABLE_NAME, batch, max_workers=4, initial_concurrency=2)
+    else:
+        result = write(TABLE_NAME, batch)
+    if write is None:
+        metrics.flush()  # pooled worker: emit this process's DynamoDB metrics
+    return {
+        "pid": os.getpid(),
+        "count": len(batch),
+        "succeeded": result["succeeded"],
+        "failed_items": result["failed_items"],
+        "throttles": result["throttles"],
+        "duration": round(time.time() - start_time, 2),
+    }
 
 # Lambda handler
+@metrics.handler
 def lambda_handler(event, _context):
     try:
         lambda_start = time.time()
 
-        body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+        body = json.loads(event['body'], parse_float=Decimal) if isinstance(event['body'], str) else event['body']
         items = body.get("users", [])
 
-        if not isinstance(items, list) or not items:
+        if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
             return {
                 "statusCode": 400,
                 "body": json.dumps("Missing or invalid 'users' list")
             }
 
-        # Split and start processes
-        processes = []
-        pipes = []
-        for i, batch in enumerate(chunk_data(items, batch_size=10)):
-            parent_conn, child_conn = Pipe()
-            p = Process(target=insert_batch, args=(batch, child_conn, i + 1))
-            p.start()
-            processes.append((p, parent_conn))
+        for item in items:
+            if "id" not in item:
+                item["id"] = str(uuid.uuid4())
 
-        logs = []
+        mode = body.get("mode", WRITE_MODE)
+        if mode == "async":
+            # No processes at all: one event loop in this process does the I/O
+            from mylib.async_writer import write_items as write_items_async
+            chunks = [items]
+            logs = [insert_chunk(items, write=write_items_async)]
+        else:
+            # Warm pool: processes and their clients survive across invocations
+            pool = get_pool('multi_process', size=POOL_SIZE, initializer=get_client)
+            chunks = chunked(items, CHUNK_SIZE)
+            logs = pool.map(insert_chunk, chunks, timeout=30)
 
-        # Join all processes and collect logs
-        for p, conn in processes:
-            p.join(timeout=30)
-            if p.is_alive():
-                p.terminate()
-                logs.append({"error": f"Process {p.name} timed out"})
-            elif conn.poll():
-                logs.append(conn.recv())
-            else:
-                logs.append({"error": f"No response from {p.name}"})
+        succeeded, failed_items = 0, []
+        for i, (chunk, log) in enumerate(zip(chunks, logs)):
+            offset = i * len(chunks[0])
+            if "error" in log:
+                failed_items.extend(
+                    {"index": offset + j, "id": item["id"], "error": log["error"]}
+                    for j, item in enumerate(chunk)
+                )
+                continue
+            succeeded += log["succeeded"]
+            failed_items.extend({**failure, "index": offset + failure["index"]} for failure in log.pop("failed_items"))
 
         total_time = time.time() - lambda_start
         print(f"⏱️ Lambda total time taken: {round(total_time, 2)} seconds.")
 
         for log in logs:
-            print(f"🧩 Process Log: {json.dumps(log)}")
+            print(f"🧩 Process Log: {json.dumps(log, default=str)}")
 
         return {
-            "statusCode": 200,
+            "statusCode": 200 if not failed_items else 207 if succeeded else 500,
             "headers": {"Content-Type": "application/json"},
             "body": json.dumps({
-                "message": "All items processed (locally or EC2 only)",
+                "message": f"{succeeded} of {len(items)} items inserted",
+                "succeeded": succeeded,
+                "failed": len(failed_items),
+                "failed_items": failed_items,
                 "logs": logs,
                 "total_time_sec": round(total_time, 2)
-            })
+            }, default=str)
         }
 
     except Exception as e:
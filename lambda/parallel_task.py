@@ -1,70 +1,66 @@
 import json
 import os
 import uuid
-import threading
 import time
-import boto3
+from decimal import Decimal
+from mylib.bulk_writer import write_items
+from mylib.metrics import metrics
 
 
-# DynamoDB table setup
-dynamodb = boto3.resource('dynamodb')
-table = dynamodb.Table(os.environ['TABLE_NAME'])  # Set this in Lambda environment
+TABLE_NAME = os.environ['TABLE_NAME']  # Set this in Lambda environment
+WRITE_MODE = os.environ.get('WRITE_MODE', 'threads')  # "threads" or "async"
 
-# Split data into chunks
-def chunk_data(data, batch_size=10):
-    for i in range(0, len(data), batch_size):
-        yield data[i:i + batch_size]
-
-# Thread-safe print lock
-print_lock = threading.Lock()
-
-# Insert a batch of items into DynamoDB with logging
-def insert_batch(batch, thread_id):
-    start_time = time.time()
-    with table.batch_writer() as writer:
-        for item in batch:
-            if "id" not in item:
-                item["id"] = str(uuid.uuid4())
-            writer.put_item(Item=item)
-
-    duration = time.time() - start_time
-    with print_lock:
-        print(f"🧵 Thread {thread_id} inserted {len(batch)} items in {duration:.2f} seconds.")
-        print(f"🧵 Thread {thread_id} data: {json.dumps(batch)}")
 
 # Lambda handler
+@metrics.handler
 def lambda_handler(event, _context):
     try:
         lambda_start = time.time()
 
-        # Parse input
-        body = json.loads(event['body']) if isinstance(event['body'], str) else event['body']
+        # Parse input (Decimal for numbers: DynamoDB does not accept floats)
+        body = json.loads(event['body'], parse_float=Decimal) if isinstance(event['body'], str) else event['body']
         items = body.get("users", [])
 
-        if not isinstance(items, list) or not items:
+        if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
             return {
                 "statusCode": 400,
                 "body": json.dumps("Missing or invalid 'users' list")
             }
 
-        #Create and start threads for each batch
-        threads = []
-        for i, batch in enumerate(chunk_data(items, batch_size=10)):
-            thread = threading.Thread(target=insert_batch, args=(batch, i + 1), name=f"BatchThread-{i+1}")
-            threads.append(thread)
-            thread.start()
+        for item in items:
+            if "id" not in item:
+                item["id"] = str(uuid.uuid4())
 
-        # Wait for all threads to complete
-        for thread in threads:
-            thread.join()
+        mode = body.get("mode", WRITE_MODE)
+        if mode == "async":
+            # One event loop, semaphore-bounded in-flight BatchWriteItem calls
+            from mylib.async_writer import write_items as write_items_async
+            result = write_items_async(TABLE_NAME, items)
+        else:
+            # 25-item BatchWriteItem requests on a bounded, throttle-aware pool
+            result = write_items(TABLE_NAME, items)
 
         total_time = time.time() - lambda_start
         print(f"⏱️ Lambda total time taken: {total_time:.2f} seconds.")
+        print(f"🧵 [{mode}] Inserted {result['succeeded']}/{result['total']} items, "
+              f"{result['throttles']} throttles, peak concurrency {result['peak_concurrency']}")
+
+        if not result["failed"]:
+            status_code, message = 200, "All items inserted successfully."
+        elif result["succeeded"]:
+            status_code, message = 207, "Some items failed to insert."
+        else:
+            status_code, message = 500, "No items were inserted."
 
         return {
-            "statusCode": 200,
+            "statusCode": status_code,
             "headers": {"Content-Type": "application/json"},
-            "body": json.dumps("All items inserted successfully.")
+            "body": json.dumps({
+                "message": message,
+                "mode": mode,
+                **result,
+                "total_time_sec": round(total_time, 2)
+            }, default=str)
         }
 
     except Exception as e:
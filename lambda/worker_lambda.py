@@ -5,26 +5,56 @@ this is SQL lambda worker that processes messages from an SQS queue and inserts
 import json
 import os
 import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+from mylib.idempotency import IdempotencyInProgress, IdempotencyStore, payload_hash
+from mylib.metrics import metrics
 
-dynamodb = boto3.resource('dynamodb')
+dynamodb = metrics.instrument(boto3.resource('dynamodb'))
 table = dynamodb.Table(os.environ['TABLE_NAME'])
 
+idempotency = IdempotencyStore(os.environ.get('IDEMPOTENCY_TABLE'))
+
+@metrics.handler
 def lambda_handler(event, _context):
-    """defines the Lambda function to process SQS messages and insert users into DynamoDB."""
+    """
+    defines the Lambda function to process SQS messages and insert users into DynamoDB.
+
+    Messages that could not be written (including ones another invocation is
+    still writing) are returned in batchItemFailures so SQS redelivers them;
+    malformed messages are logged and dropped.
+    """
     print(event)
+    failures = []
     for record in event['Records']:
         try:
             users = json.loads(record['body'])
-            # Insert each user
-            with table.batch_writer() as batch:
-                for user in users:
-                    batch.put_item(Item=user)
 
+            def write_users():
+                # Insert each user
+                with metrics.timer('RecordLatency'), table.batch_writer() as batch:
+                    for user in users:
+                        batch.put_item(Item=user)
+                metrics.put('UsersWritten', len(users))
+                return {"written": len(users)}
+
+            # A redelivered (or re-sent) message with the same users is written once
+            _, replayed = idempotency.run(f"worker_lambda#{payload_hash(users)}", users, write_users)
+            if replayed:
+                metrics.put('IdempotentReplays', 1)
+                print(f"Skipping duplicate message {record.get('messageId')}")
+
+        except IdempotencyInProgress:
+            # the other invocation may still fail; keep the message until it is done
+            print(f"Message {record.get('messageId')} is already being processed elsewhere; retrying later")
+            failures.append({"itemIdentifier": record['messageId']})
+        except (boto3.exceptions.Boto3Error, BotoCoreError, ClientError) as e:
+            print(f"AWS error: {e}")
+            failures.append({"itemIdentifier": record['messageId']})
         except json.JSONDecodeError as e:
             print(f"JSON decode error: {e}")
-        except boto3.exceptions.Boto3Error as e:
-            print(f"Boto3 error: {e}")
         except KeyError as e:
             print(f"Missing expected key: {e}")
         except TypeError as e:
-            print(f"Type error: {e}")
\ No newline at end of file
+            print(f"Type error: {e}")
+
+    return {"batchItemFailures": failures}
@@ -0,0 +1,174 @@
+"""
+asyncio DynamoDB bulk-write path built on aiobotocore.
+
+Bulk inserts are pure network I/O, so instead of threads or processes this
+runs every 25-item BatchWriteItem request as a coroutine on one event loop,
+with an asyncio.Semaphore capping how many are in flight. Hundreds of
+concurrent requests cost a few KB each rather than a thread stack or a
+forked process.
+
+The event loop and the aiobotocore client are module-level and reused while
+the Lambda container is warm. aiobotocore is imported lazily, so handlers
+that never take the async path do not pay for it at cold start.
+
+Results use the same shape as mylib.bulk_writer, so handlers can switch modes
+without changing their responses.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import random
+from contextlib import AsyncExitStack
+
+from botocore.exceptions import ClientError
+
+from mylib import bulk_writer
+from mylib.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_IN_FLIGHT = int(os.environ.get('ASYNC_MAX_IN_FLIGHT', 64))
+
+_loop = None
+_client = None
+_exit_stack = None
+
+
+def _get_loop():
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop
+
+
+async def _get_client():
+    global _client, _exit_stack
+    if _client is None:
+        try:
+            from aiobotocore.config import AioConfig
+            from aiobotocore.session import get_session
+        except ImportError as exc:
+            raise RuntimeError(
+                "aiobotocore is required for the async write mode; add it to the dependency layer"
+            ) from exc
+        _exit_stack = AsyncExitStack()
+        _client = metrics.instrument(await _exit_stack.enter_async_context(
+            get_session().create_client(
+                'dynamodb',
+                config=AioConfig(
+                    retries={'mode': 'standard', 'max_attempts': 1},
+                    max_pool_connections=MAX_IN_FLIGHT,
+                ),
+            )
+        ))
+    return _client
+
+
+@atexit.register
+def _close_client():
+    global _client
+    if _client is not None and _loop is not None and not _loop.is_closed():
+        _loop.run_until_complete(_exit_stack.aclose())
+        _client = None
+
+
+class _Stats:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.throttles = 0
+
+
+async def _write_batch(client, table_name: str, batch: list, semaphore, stats: _Stats) -> dict:
+    """Async twin of bulk_writer._write_batch; returns index -> error."""
+    pending = dict(batch)
+    errors = {}
+    for attempt in range(bulk_writer.MAX_ATTEMPTS):
+        split = False
+        async with semaphore:
+            stats.in_flight += 1
+            stats.peak = max(stats.peak, stats.in_flight)
+            try:
+                response = await client.batch_write_item(
+                    RequestItems={table_name: list(pending.values())}
+                )
+                unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+                stats.throttles += bool(unprocessed)
+                left = {bulk_writer._fingerprint(request) for request in unprocessed}
+                pending = {
+                    index: request for index, request in pending.items()
+                    if bulk_writer._fingerprint(request) in left
+                }
+            except ClientError as exc:
+                code = exc.response['Error']['Code']
+                if code == 'ValidationException' and len(pending) > 1:
+                    split = True
+                elif code not in bulk_writer.THROTTLE_ERRORS:
+                    return {index: f"{code}: {exc.response['Error'].get('Message', '')}" for index in pending}
+                else:
+                    stats.throttles += 1
+            except Exception as exc:  # pylint: disable=broad-except
+                # connection-level errors (aiohttp / botocore) are retried
+                errors = {index: str(exc) for index in pending}
+            finally:
+                stats.in_flight -= 1
+
+        if split:
+            # same bisection as bulk_writer: isolate the item DynamoDB rejected
+            entries = list(pending.items())
+            half = len(entries) // 2
+            first, second = await asyncio.gather(
+                _write_batch(client, table_name, entries[:half], semaphore, stats),
+                _write_batch(client, table_name, entries[half:], semaphore, stats),
+            )
+            return {**first, **second}
+        if not pending:
+            return {}
+        await asyncio.sleep(random.uniform(0, min(bulk_writer.MAX_BACKOFF, bulk_writer.BASE_BACKOFF * 2 ** attempt)))
+
+    reason = "throttled: retries exhausted"
+    return {index: errors.get(index, reason) for index in pending}
+
+
+async def write_requests_async(table_name: str, requests: list, max_in_flight: int = MAX_IN_FLIGHT) -> dict:
+    """
+    Run BatchWriteItem requests concurrently on the current event loop.
+
+    Args:
+        table_name: Target table.
+        requests: DynamoDB-JSON PutRequest/DeleteRequest entries.
+        max_in_flight: Upper bound on concurrent BatchWriteItem calls.
+
+    Returns:
+        dict: {"failures": {index: error}, "throttles": int, "peak_concurrency": int}
+    """
+    client = await _get_client()
+    semaphore = asyncio.Semaphore(max_in_flight)
+    stats = _Stats()
+    indexed = list(enumerate(requests))
+    batches = [indexed[i:i + bulk_writer.BATCH_SIZE] for i in range(0, len(indexed), bulk_writer.BATCH_SIZE)]
+
+    outcomes = await asyncio.gather(
+        *(_write_batch(client, table_name, batch, semaphore, stats) for batch in batches),
+        return_exceptions=True,
+    )
+    failures = {}
+    for batch, outcome in zip(batches, outcomes):
+        if isinstance(outcome, BaseException):
+            failures.update({index: str(outcome) for index, _ in batch})
+        else:
+            failures.update(outcome)
+    return {"failures": failures, "throttles": stats.throttles, "peak_concurrency": stats.peak}
+
+
+def write_requests(table_name: str, requests: list, max_in_flight: int = MAX_IN_FLIGHT) -> dict:
+    """Blocking entry point for write_requests_async on the module's warm loop."""
+    return _get_loop().run_until_complete(write_requests_async(table_name, requests, max_in_flight))
+
+
+def write_items(table_name: str, items: list, key_attr: str = 'id', max_in_flight: int = MAX_IN_FLIGHT) -> dict:
+    """Async-path equivalent of bulk_writer.write_items; same summary shape."""
+    return bulk_writer.write_items(
+        table_name, items, key_attr=key_attr, writer=write_requests, max_in_flight=max_in_flight
+    )
@@ -0,0 +1,359 @@
+"""
+Concurrent DynamoDB bulk-write engine shared by the bulk handlers.
+
+Items are sent as 25-item BatchWriteItem requests from a bounded thread pool.
+How many requests are in flight at once is governed by an AIMD limiter: every
+clean batch nudges the limit up, every throttle (a throughput exception or a
+non-empty UnprocessedItems) halves it, so a run settles at whatever the table
+can actually absorb instead of hammering it.
+
+Every input item ends up either succeeded or failed, and failures carry the
+item index and reason so handlers can report them back to the caller. One bad
+item must not sink its 25-item batch: entries missing a key attribute are
+failed before sending, repeated keys are collapsed, and a batch DynamoDB still
+rejects with a ValidationException is bisected until the bad item is isolated.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+from mylib.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 25
+MAX_WORKERS = 16
+INITIAL_CONCURRENCY = 4
+MAX_ATTEMPTS = 8
+BASE_BACKOFF = 0.05
+MAX_BACKOFF = 2.0
+THROTTLE_ERRORS = {
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+}
+
+serializer = TypeSerializer()
+
+_client = None
+_client_lock = threading.Lock()
+_key_names = {}  # table name -> primary key attribute names
+
+
+def get_client():
+    """
+    Low-level DynamoDB client, created on first use and reused while warm.
+
+    botocore's own retries are disabled so throttles surface here and drive
+    the AIMD limiter instead of being absorbed silently.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = metrics.instrument(boto3.client(
+                'dynamodb',
+                config=Config(
+                    retries={'mode': 'standard', 'max_attempts': 1},
+                    max_pool_connections=MAX_WORKERS,
+                ),
+            ))
+        return _client
+
+
+def _reset_client():
+    """Drop the client inherited across fork; sockets must not be shared."""
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_client)
+
+
+def key_names(table_name: str, client=None) -> list:
+    """Primary key attribute names of a table; one DescribeTable per table while warm."""
+    if table_name not in _key_names:
+        table = (client or get_client()).describe_table(TableName=table_name)['Table']
+        _key_names[table_name] = [entry['AttributeName'] for entry in table['KeySchema']]
+    return _key_names[table_name]
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit (additive increase, multiplicative decrease).
+
+    Args:
+        initial: Starting number of concurrent requests.
+        minimum: Lower bound for the limit.
+        maximum: Upper bound for the limit (the executor size).
+        cooldown: Seconds after a decrease during which further throttles
+            are treated as the same congestion event.
+    """
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=1, maximum=MAX_WORKERS, cooldown=0.2):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.cooldown = cooldown
+        self._limit = float(max(minimum, min(initial, maximum)))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self.peak = int(self._limit)
+        self.throttles = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.throttles += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._limit = max(self.minimum, self._limit / 2)
+                    self._last_decrease = now
+            else:
+                self._limit = min(self.maximum, self._limit + 1 / self._limit)
+                self.peak = max(self.peak, int(self._limit))
+            self._cond.notify_all()
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** attempt))
+
+
+def _fingerprint(request: dict) -> str:
+    return json.dumps(request, sort_keys=True)
+
+
+def _write_batch(client, table_name: str, batch: list, limiter: AIMDLimiter) -> dict:
+    """
+    Write one batch of (index, request) pairs, retrying unprocessed items.
+
+    Returns:
+        dict: index -> error message for every item that could not be written.
+    """
+    pending = dict(batch)
+    errors = {}
+    for attempt in range(MAX_ATTEMPTS):
+        limiter.acquire()
+        throttled = split = False
+        try:
+            response = client.batch_write_item(
+                RequestItems={table_name: list(pending.values())}
+            )
+            unprocessed = response.get('UnprocessedItems', {}).get(table_name, [])
+            throttled = bool(unprocessed)
+            left = {_fingerprint(request) for request in unprocessed}
+            pending = {
+                index: request for index, request in pending.items()
+                if _fingerprint(request) in left
+            }
+        except ClientError as exc:
+            code = exc.response['Error']['Code']
+            if code == 'ValidationException' and len(pending) > 1:
+                split = True
+            elif code not in THROTTLE_ERRORS:
+                return {index: f"{code}: {exc.response['Error'].get('Message', '')}" for index in pending}
+            else:
+                throttled = True
+        except BotoCoreError as exc:
+            # connection resets / read timeouts: back off like a throttle rather
+            # than counting a clean batch and raising the limit
+            errors = {index: str(exc) for index in pending}
+            throttled = True
+        finally:
+            limiter.release(throttled)
+
+        if split:
+            # DynamoDB rejects the whole batch for one bad item; bisect so the
+            # good ones are still written and only the culprit is reported
+            entries = list(pending.items())
+            half = len(entries) // 2
+            return {
+                **_write_batch(client, table_name, entries[:half], limiter),
+                **_write_batch(client, table_name, entries[half:], limiter),
+            }
+
+        if not pending:
+            return {}
+        time.sleep(_backoff(attempt))
+
+    reason = "throttled: retries exhausted"
+    return {index: errors.get(index, reason) for index in pending}
+
+
+def write_requests(table_name: str, requests: list, client=None,
+                   max_workers: int = MAX_WORKERS,
+                   initial_concurrency: int = INITIAL_CONCURRENCY) -> dict:
+    """
+    Run BatchWriteItem PutRequest/DeleteRequest entries concurrently.
+
+    Args:
+        table_name: Target table.
+        requests: Write requests with DynamoDB-JSON typed values, e.g.
+            {"PutRequest": {"Item": {"id": {"S": "1"}}}}.
+        client: Optional low-level DynamoDB client; defaults to get_client().
+        max_workers: Size of the thread pool and upper bound for the limiter.
+        initial_concurrency: Requests in flight before any feedback arrives.
+
+    Returns:
+        dict: {"failures": {index: error}, "throttles": int, "peak_concurrency": int}
+    """
+    client = client or get_client()
+    limiter = AIMDLimiter(initial=initial_concurrency, maximum=max_workers)
+    indexed = list(enumerate(requests))
+    batches = [indexed[i:i + BATCH_SIZE] for i in range(0, len(indexed), BATCH_SIZE)]
+
+    failures = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="BatchWrite") as executor:
+        futures = [
+            executor.submit(_write_batch, client, table_name, batch, limiter)
+            for batch in batches
+        ]
+        for future, batch in zip(futures, batches):
+            try:
+                failures.update(future.result())
+            except Exception as exc:  # pylint: disable=broad-except
+                failures.update({index: str(exc) for index, _ in batch})
+
+    return {
+        "failures": failures,
+        "throttles": limiter.throttles,
+        "peak_concurrency": limiter.peak,
+    }
+
+
+def _send(table_name: str, entries: list, request_type: str, writer=None, key_attrs: list = None,
+          **kwargs) -> tuple:
+    """
+    Serialize plain Python items/keys and send them as write requests.
+
+    Entries missing a key attribute fail without being sent. When several
+    entries share a key only the last is sent, as if they had been written in
+    order; the earlier ones share its outcome.
+
+    Args:
+        key_attrs: The table's key attribute names; looked up when omitted.
+
+    Returns:
+        tuple: ({entry index: error}, writer result)
+    """
+    field = 'Item' if request_type == 'PutRequest' else 'Key'
+    key_attrs = key_attrs or key_names(table_name)
+    failures = {}
+    requests, positions = [], []
+    by_key = {}       # serialized key -> position in requests
+    superseded = {}   # entry index -> position of the later entry with the same key
+    for index, entry in enumerate(entries):
+        try:
+            wire = {key: serializer.serialize(value) for key, value in entry.items()}
+        except (TypeError, AttributeError) as exc:
+            failures[index] = f"SerializationError: {exc}"
+            continue
+        missing = [name for name in key_attrs if name not in wire]
+        if missing:
+            failures[index] = f"ValidationException: missing key attribute(s) {missing}"
+            continue
+        if request_type == 'DeleteRequest' and len(wire) != len(key_attrs):
+            failures[index] = f"ValidationException: a key must have exactly {key_attrs}"
+            continue
+        key = json.dumps([wire[name] for name in key_attrs], sort_keys=True)
+        if key in by_key:
+            position = by_key[key]
+            superseded[positions[position]] = position
+            requests[position] = {request_type: {field: wire}}
+            positions[position] = index
+            continue
+        by_key[key] = len(requests)
+        requests.append({request_type: {field: wire}})
+        positions.append(index)
+
+    writer = writer or write_requests
+    result = writer(table_name, requests, **kwargs) if requests else {
+        "failures": {}, "throttles": 0, "peak_concurrency": 0
+    }
+    for request_index, error in result["failures"].items():
+        failures[positions[request_index]] = error
+    for index, position in superseded.items():
+        if position in result["failures"]:
+            failures[index] = result["failures"][position]
+    if failures:
+        logger.warning("Bulk %s on %s: %d of %d failed", request_type, table_name, len(failures), len(entries))
+    return failures, result
+
+
+def write_items(table_name: str, items: list, key_attr: str = 'id', writer=None, **kwargs) -> dict:
+    """
+    Put plain Python items (as produced by json.loads) into a table.
+
+    Items that cannot be serialized (e.g. floats) are reported as failures
+    without being sent.
+
+    Args:
+        writer: Function with the write_requests signature that sends the
+            requests; defaults to the threaded write_requests.
+        key_attrs: The table's key attribute names (default: DescribeTable).
+        **kwargs: Passed through to writer.
+
+    Returns:
+        dict: Summary suitable for an HTTP response body:
+            {"total", "succeeded", "failed", "failed_items": [{"index", key_attr, "error"}],
+             "throttles", "peak_concurrency"}
+    """
+    failures, result = _send(table_name, items, 'PutRequest', writer, **kwargs)
+    failed_items = [
+        {
+            "index": index,
+            key_attr: items[index].get(key_attr) if isinstance(items[index], dict) else None,
+            "error": error,
+        }
+        for index, error in sorted(failures.items())
+    ]
+    return {
+        "total": len(items),
+        "succeeded": len(items) - len(failed_items),
+        "failed": len(failed_items),
+        "failed_items": failed_items,
+        "throttles": result["throttles"],
+        "peak_concurrency": result["peak_concurrency"],
+    }
+
+
+def delete_keys(table_name: str, keys: list, writer=None, **kwargs) -> dict:
+    """
+    Delete items by primary key (plain Python dicts) as 25-key DeleteRequests.
+
+    BatchWriteItem does not say whether a key existed, so "processed" counts
+    every key DynamoDB accepted the delete for, including keys with no item.
+
+    Returns:
+        dict: {"requested", "processed", "failed", "failed_keys": [{"key", "error"}],
+               "throttles", "peak_concurrency"}
+    """
+    failures, result = _send(table_name, keys, 'DeleteRequest', writer, **kwargs)
+    return {
+        "requested": len(keys),
+        "processed": len(keys) - len(failures),
+        "failed": len(failures),
+        "failed_keys": [{"key": keys[index], "error": error} for index, error in sorted(failures.items())],
+        "throttles": result["throttles"],
+        "peak_concurrency": result["peak_concurrency"],
+    }
@@ -0,0 +1,188 @@
+"""
+Idempotency for the bulk ingestion path.
+
+Two layers stop retries from writing (and paying for) the same data twice:
+
+1. Deterministic IDs: deterministic_id() derives an item ID from the client's
+   idempotency key plus a hash of the item content, so a replayed request
+   produces the same IDs and overwrites rather than duplicates.
+2. Request records: IdempotencyStore.run() executes a request once per
+   record ID. The first caller claims a TTL'd record in DynamoDB with a
+   conditional put, runs the work and stores the response; replays get the
+   stored response back without doing the work again. A small in-process
+   cache answers repeats on a warm container without a DynamoDB read.
+
+A claimed-but-unfinished record expires after IN_PROGRESS_SECONDS, so a
+crashed invocation does not block retries for the whole TTL.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import boto3
+from botocore.exceptions import ClientError
+
+from mylib.metrics import metrics
+
+TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 24 * 3600))
+IN_PROGRESS_SECONDS = 90
+CACHE_SIZE = 1024
+
+# Fixed namespace so IDs are stable across deployments
+ID_NAMESPACE = uuid.UUID('6f1c1b4e-5a0e-4c1e-9a57-0d1f3b7c2a90')
+
+STATUS_IN_PROGRESS = 'IN_PROGRESS'
+STATUS_COMPLETED = 'COMPLETED'
+
+
+class IdempotencyInProgress(Exception):
+    """Another invocation is currently processing the same request."""
+
+
+class IdempotencyKeyReused(Exception):
+    """The idempotency key was already used with a different payload."""
+
+
+def payload_hash(payload) -> str:
+    """SHA-256 of the canonical JSON form of payload."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def deterministic_id(idempotency_key, content) -> str:
+    """UUIDv5 from the client idempotency key (may be None) and the content hash."""
+    return str(uuid.uuid5(ID_NAMESPACE, f"{idempotency_key or ''}:{payload_hash(content)}"))
+
+
+def header(event: dict, name: str):
+    """Case-insensitive API Gateway header lookup."""
+    wanted = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == wanted:
+            return value
+    return None
+
+
+class IdempotencyStore:
+    """
+    TTL'd idempotency records in a DynamoDB table (hash key "id", TTL
+    attribute "expiration"), fronted by an in-process LRU cache.
+
+    Args:
+        table_name: Idempotency table; None keeps records in the local cache
+            only (still dedupes retries that land on the same container).
+        ttl_seconds: How long completed responses are replayed.
+    """
+
+    def __init__(self, table_name: str = None, ttl_seconds: int = TTL_SECONDS, cache_size: int = CACHE_SIZE):
+        self.table = (
+            metrics.instrument(boto3.resource('dynamodb'), partition_key='id').Table(table_name)
+            if table_name else None
+        )
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # record_id -> (expiration, payload_hash, response)
+        self._lock = threading.Lock()
+
+    # -- local cache -------------------------------------------------------------
+
+    def _cached(self, record_id: str):
+        with self._lock:
+            entry = self._cache.get(record_id)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._cache[record_id]
+                return None
+            self._cache.move_to_end(record_id)
+            return entry
+
+    def _remember(self, record_id: str, expiration: int, digest: str, response):
+        with self._lock:
+            self._cache[record_id] = (expiration, digest, response)
+            self._cache.move_to_end(record_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # -- record lifecycle --------------------------------------------------------
+
+    def _claim(self, record_id: str, digest: str):
+        """Claim the record; returns a stored response if the request already completed."""
+        now = int(time.time())
+        try:
+            self.table.put_item(
+                Item={
+                    'id': record_id,
+                    'status': STATUS_IN_PROGRESS,
+                    'payload_hash': digest,
+                    'expiration': now + IN_PROGRESS_SECONDS,
+                },
+                ConditionExpression='attribute_not_exists(#id) OR #exp < :now',
+                ExpressionAttributeNames={'#id': 'id', '#exp': 'expiration'},
+                ExpressionAttributeValues={':now': now},
+            )
+            return None
+        except ClientError as exc:
+            if exc.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+        record = self.table.get_item(Key={'id': record_id}, ConsistentRead=True).get('Item')
+        if record is None:  # expired and removed in between; claim again
+            return self._claim(record_id, digest)
+        if record.get('payload_hash') != digest:
+            raise IdempotencyKeyReused(record_id)
+        if record['status'] != STATUS_COMPLETED:
+            raise IdempotencyInProgress(record_id)
+        response = json.loads(record['response'])
+        self._remember(record_id, int(record['expiration']), digest, response)
+        return response
+
+    def run(self, record_id: str, payload, func):
+        """
+        Return func() the first time record_id is seen, and the stored result
+        on every replay within the TTL.
+
+        Args:
+            record_id: Idempotency record key (client key or a payload hash).
+            payload: The request content; replays with the same record_id but
+                different content raise IdempotencyKeyReused.
+            func: Zero-argument callable doing the work; its (JSON-serializable)
+                return value is what replays receive.
+
+        Returns:
+            tuple: (response, replayed)
+        """
+        digest = payload_hash(payload)
+        cached = self._cached(record_id)
+        if cached is not None:
+            if cached[1] != digest:
+                raise IdempotencyKeyReused(record_id)
+            return cached[2], True
+
+        if self.table is not None:
+            stored = self._claim(record_id, digest)
+            if stored is not None:
+                return stored, True
+
+        try:
+            response = func()
+        except Exception:
+            if self.table is not None:
+                self.table.delete_item(Key={'id': record_id})
+            raise
+
+        expiration = int(time.time()) + self.ttl_seconds
+        if self.table is not None:
+            self.table.put_item(Item={
+                'id': record_id,
+                'status': STATUS_COMPLETED,
+                'payload_hash': digest,
+                'response': json.dumps(response, default=str),
+                'expiration': expiration,
+            })
+        self._remember(record_id, expiration, digest, response)
+        return response, False
@@ -0,0 +1,313 @@
+"""
+Handler and DynamoDB instrumentation emitted as CloudWatch Embedded Metric Format.
+
+Metric values are buffered in memory and written as ONE structured log line per
+flush; CloudWatch extracts the metrics from that line, so there are no
+PutMetricData calls on the request path. The `handler` decorator flushes once
+at the end of every invocation.
+
+What gets recorded:
+    - handler latency, invocations, errors and cold starts (`handler`)
+    - arbitrary blocks/functions (`timer` / `timed`)
+    - per DynamoDB call latency and ReturnConsumedCapacity RCU/WCU, plus
+      throttles, for any client/resource passed to `instrument`
+    - the hottest partition keys, tracked with a fixed-size Space-Saving
+      sketch that lives for the whole container; the top keys are logged as
+      "HotPartitions" at most every HOT_KEY_INTERVAL_SECONDS, after which
+      the counts are halved so old traffic fades out instead of vanishing
+
+Usage:
+    from mylib.metrics import metrics
+
+    table = metrics.instrument(boto3.resource('dynamodb')).Table(name)
+
+    @metrics.handler
+    def lambda_handler(event, context): ...
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'UserApi')
+MAX_VALUES_PER_METRIC = 100  # EMF limit per metric per document
+MAX_METRICS = 100            # EMF limit per document
+HOT_KEY_INTERVAL_SECONDS = float(os.environ.get('HOT_KEY_INTERVAL_SECONDS', 60))
+
+CAPACITY_OPERATIONS = {
+    'GetItem', 'PutItem', 'DeleteItem', 'UpdateItem', 'Query', 'Scan',
+    'BatchGetItem', 'BatchWriteItem', 'TransactGetItems', 'TransactWriteItems',
+}
+READ_OPERATIONS = {'GetItem', 'Query', 'Scan', 'BatchGetItem', 'TransactGetItems'}
+THROTTLE_ERRORS = {
+    'ProvisionedThroughputExceededException', 'ThrottlingException', 'RequestLimitExceeded',
+}
+
+logger = logging.getLogger(__name__)
+
+
+class SpaceSaving:
+    """
+    Heavy-hitter sketch (Metwally et al. Space-Saving) in O(capacity) memory.
+
+    Any key whose true frequency exceeds total / capacity is guaranteed to be
+    tracked; each reported count over-estimates by at most its `error`.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counters = {}  # key -> [count, error]
+
+    def add(self, key, count: int = 1):
+        entry = self.counters.get(key)
+        if entry is not None:
+            entry[0] += count
+        elif len(self.counters) < self.capacity:
+            self.counters[key] = [count, 0]
+        else:
+            victim = min(self.counters, key=lambda k: self.counters[k][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[key] = [floor + count, floor]
+
+    def top(self, n: int = 10) -> list:
+        ranked = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:n]
+        return [{"key": key, "count": count, "error": error} for key, (count, error) in ranked]
+
+    def decay(self, factor: float = 0.5):
+        """Scale every count (and error) by factor, dropping keys that reach zero."""
+        self.counters = {
+            key: [int(count * factor), int(error * factor)]
+            for key, (count, error) in self.counters.items()
+            if int(count * factor) > 0
+        }
+
+    def clear(self):
+        self.counters = {}
+
+
+def _scalar(value):
+    """Plain value of a DynamoDB attribute given as {'S': 'x'} or 'x'."""
+    if isinstance(value, dict) and len(value) == 1:
+        return str(next(iter(value.values())))
+    return str(value)
+
+
+def _partition_keys(operation: str, params: dict, partition_key: str) -> list:
+    if operation in ('GetItem', 'DeleteItem', 'UpdateItem'):
+        records = [params.get('Key', {})]
+    elif operation == 'PutItem':
+        records = [params.get('Item', {})]
+    elif operation == 'BatchWriteItem':
+        records = [
+            request.get('PutRequest', {}).get('Item') or request.get('DeleteRequest', {}).get('Key', {})
+            for requests in params.get('RequestItems', {}).values()
+            for request in requests
+        ]
+    else:
+        return []
+    return [_scalar(record[partition_key]) for record in records if partition_key in record]
+
+
+def _failed(response) -> bool:
+    """Handlers catch their own exceptions and return a 5xx (or "Error" for streams)."""
+    if isinstance(response, dict):
+        status = response.get('statusCode')
+        return isinstance(status, int) and status >= 500
+    return response == "Error"
+
+
+def _capacity_units(consumed) -> float:
+    if not consumed:
+        return 0.0
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return float(sum(entry.get('CapacityUnits', 0) for entry in consumed))
+
+
+class Metrics:
+    """
+    Thread-safe EMF metric buffer.
+
+    Args:
+        namespace: CloudWatch namespace.
+        service: Value of the "Service" dimension (defaults to the function name).
+        hot_key_capacity: Counters kept by the partition-key sketch.
+        hot_key_top: How many hot keys each report includes.
+        hot_key_interval: Minimum seconds between HotPartitions reports; the
+            sketch accumulates across invocations in between.
+    """
+
+    def __init__(self, namespace: str = NAMESPACE, service: str = None,
+                 hot_key_capacity: int = 64, hot_key_top: int = 10,
+                 hot_key_interval: float = HOT_KEY_INTERVAL_SECONDS):
+        self.namespace = namespace
+        self.service = service or os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')
+        self.hot_keys = SpaceSaving(hot_key_capacity)
+        self.hot_key_top = hot_key_top
+        self.hot_key_interval = hot_key_interval
+        self._hot_reported = time.monotonic()
+        self._values = {}  # name -> (unit, [values])
+        self._lock = threading.Lock()
+        self._cold = True
+
+    # -- recording -------------------------------------------------------------
+
+    def put(self, name: str, value: float, unit: str = 'Count'):
+        with self._lock:
+            _, values = self._values.setdefault(name, (unit, []))
+            values.append(value)
+            full = len(values) >= MAX_VALUES_PER_METRIC or len(self._values) >= MAX_METRICS
+        if full:
+            self.flush()
+
+    def add_partition_key(self, key, count: int = 1):
+        with self._lock:
+            self.hot_keys.add(_scalar(key), count)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Record the duration of the block as `name` in milliseconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.put(name, round((time.perf_counter() - start) * 1000, 3), 'Milliseconds')
+
+    def timed(self, name: str = None):
+        """Decorator form of timer(); defaults to '<function>Latency'."""
+        def decorator(func):
+            metric = name or f"{func.__name__}Latency"
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(metric):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def handler(self, func):
+        """
+        Decorator for lambda_handler: latency, invocation/error/cold-start
+        counts, then one flush per invocation. A raised exception and a
+        returned 5xx or "Error" both count as an error; a failing flush is
+        logged rather than replacing the handler's response.
+        """
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if self._cold:
+                self._cold = False
+                self.put('ColdStart', 1)
+            self.put('Invocations', 1)
+            try:
+                with self.timer('HandlerLatency'):
+                    response = func(*args, **kwargs)
+            except Exception:
+                self.put('Errors', 1)
+                self._flush_quietly()
+                raise
+            if _failed(response):
+                self.put('Errors', 1)
+            self._flush_quietly()
+            return response
+        return wrapper
+
+    # -- DynamoDB ----------------------------------------------------------------
+
+    def instrument(self, boto_obj, partition_key: str = None):
+        """
+        Hook a DynamoDB client or resource so every call records latency,
+        consumed capacity (ReturnConsumedCapacity=TOTAL is added when the
+        caller did not ask for it) and throttles, and feeds written/read
+        partition keys to the hot-key sketch.
+
+        Returns:
+            The same client/resource, for chaining.
+        """
+        client = getattr(boto_obj.meta, 'client', boto_obj)  # resource -> its client
+        partition_key = partition_key or os.environ.get('PARTITION_KEY', 'id')
+        events = client.meta.events
+
+        def before_parameter_build(params, model, **_):
+            if model.name in CAPACITY_OPERATIONS:
+                params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+            keys = _partition_keys(model.name, params, partition_key)
+            if keys:
+                with self._lock:
+                    for key in keys:
+                        self.hot_keys.add(key)
+
+        def before_call(context, **_):
+            context['metrics_start'] = time.perf_counter()
+
+        def after_call(parsed, model, context, **_):
+            start = context.get('metrics_start')
+            if start is not None:
+                self.put(f"{model.name}Latency", round((time.perf_counter() - start) * 1000, 3), 'Milliseconds')
+            code = parsed.get('Error', {}).get('Code')
+            if code in THROTTLE_ERRORS:
+                self.put('Throttles', 1)
+            units = _capacity_units(parsed.get('ConsumedCapacity'))
+            if units:
+                self.put('ConsumedRCU' if model.name in READ_OPERATIONS else 'ConsumedWCU', units)
+
+        events.register('before-parameter-build.dynamodb', before_parameter_build)
+        events.register('before-call.dynamodb', before_call)
+        events.register('after-call.dynamodb', after_call)
+        return boto_obj
+
+    # -- output ------------------------------------------------------------------
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Metrics flush failed")
+
+    def flush(self, report_hot_keys: bool = False):
+        """
+        Write everything buffered as one EMF log line and reset the buffer.
+        HotPartitions is included once hot_key_interval has passed since the
+        last report (or when report_hot_keys is set), then the sketch decays.
+        """
+        with self._lock:
+            values, self._values = self._values, {}
+            hot = []
+            now = time.monotonic()
+            if report_hot_keys or now - self._hot_reported >= self.hot_key_interval:
+                hot = self.hot_keys.top(self.hot_key_top)
+                self.hot_keys.decay()
+                self._hot_reported = now
+        if not values and not hot:
+            return
+        document = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [["Service"]],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, (unit, _) in values.items()],
+                }],
+            },
+            "Service": self.service,
+        }
+        for name, (_, samples) in values.items():
+            document[name] = samples if len(samples) > 1 else samples[0]
+        if hot:
+            document["HotPartitions"] = hot
+        print(json.dumps(document, separators=(',', ':'), default=str))
+
+
+metrics = Metrics()
+
+
+def _reset_after_fork():
+    # a forked worker must not re-emit what the parent had buffered
+    metrics._values = {}
+    metrics._lock = threading.Lock()
+    metrics.hot_keys.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,173 @@
+"""
+Persistent worker-process pool with Pipe-only IPC.
+
+multiprocessing.Pool and multiprocessing.Queue need POSIX semaphores backed by
+/dev/shm, which Lambda does not provide. This pool only uses Process and Pipe:
+each worker owns one duplex pipe, receives (func, chunk) tasks and sends back
+whatever the function returns -- keep that a compact summary rather than the
+input chunk.
+
+Keep the pool in a module-level variable (see get_pool) so it outlives the
+invocation: warm invocations then skip process spawn, imports and client
+setup entirely. Worker processes keep their own module state, so anything a
+task function caches (e.g. a boto3 client) is created once per worker.
+"""
+import itertools
+import logging
+import os
+import time
+from multiprocessing import Pipe, get_context
+from multiprocessing.connection import wait
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZE = min(4, os.cpu_count() or 1)
+
+
+def _worker_loop(conn, initializer, initargs):
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        sequence, func, chunk = task
+        try:
+            conn.send((sequence, True, func(chunk)))
+        except Exception as exc:  # pylint: disable=broad-except
+            conn.send((sequence, False, f"{type(exc).__name__}: {exc}"))
+    conn.close()
+
+
+class WorkerPool:
+    """
+    Fixed-size pool of forked worker processes.
+
+    Args:
+        size: Number of worker processes.
+        initializer: Optional callable run once in each worker at startup,
+            e.g. to create the worker's client.
+        initargs: Arguments for initializer.
+    """
+
+    def __init__(self, size: int = DEFAULT_SIZE, initializer=None, initargs=()):
+        self.size = size
+        self.initializer = initializer
+        self.initargs = initargs
+        self._ctx = get_context('fork')
+        self._sequence = itertools.count()  # tags every task sent, across map() calls
+        self._workers = [self._spawn() for _ in range(size)]
+
+    def _spawn(self):
+        parent_conn, child_conn = Pipe()
+        process = self._ctx.Process(
+            target=_worker_loop,
+            args=(child_conn, self.initializer, self.initargs),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _replace(self, slot: int):
+        process, conn = self._workers[slot]
+        if process.is_alive():
+            process.terminate()
+        process.join(timeout=1)
+        conn.close()
+        self._workers[slot] = self._spawn()
+
+    def map(self, func, chunks: list, timeout: float = 30) -> list:
+        """
+        Run func(chunk) for every chunk across the workers.
+
+        Chunks are handed out one at a time as workers become free. A worker
+        that raises reports the error; a worker that dies or runs past the
+        timeout is replaced and its chunk reported as failed.
+
+        Returns:
+            list: One entry per chunk, in order: the function's return value,
+                or {"error": message} if that chunk failed.
+        """
+        results = [None] * len(chunks)
+        pending = list(range(len(chunks)))
+        pending.reverse()
+        busy = {}  # slot -> (task_id, sequence, started)
+
+        for slot, (process, _) in enumerate(self._workers):
+            if not process.is_alive():
+                self._replace(slot)
+
+        while pending or busy:
+            for slot in range(self.size):
+                if slot not in busy and pending:
+                    task_id = pending.pop()
+                    sequence = next(self._sequence)
+                    try:
+                        self._workers[slot][1].send((sequence, func, chunks[task_id]))
+                    except (BrokenPipeError, OSError):
+                        self._replace(slot)
+                        self._workers[slot][1].send((sequence, func, chunks[task_id]))
+                    busy[slot] = (task_id, sequence, time.monotonic())
+
+            conns = {self._workers[slot][1]: slot for slot in busy}
+            for conn in wait(list(conns), timeout=0.5):
+                slot = conns[conn]
+                task_id, sequence, _ = busy[slot]
+                try:
+                    reply_sequence, ok, value = conn.recv()
+                except EOFError:
+                    busy.pop(slot)
+                    results[task_id] = {"error": f"Worker {self._workers[slot][0].pid} exited"}
+                    self._replace(slot)
+                    continue
+                if reply_sequence != sequence:
+                    # left over from an earlier map() that exited with this task in flight
+                    logger.warning("Dropping stale reply %s from worker slot %d", reply_sequence, slot)
+                    continue
+                busy.pop(slot)
+                results[task_id] = value if ok else {"error": value}
+
+            now = time.monotonic()
+            for slot, (task_id, _, started) in list(busy.items()):
+                if now - started > timeout:
+                    results[task_id] = {"error": f"Worker {self._workers[slot][0].pid} timed out"}
+                    busy.pop(slot)
+                    self._replace(slot)
+
+        return results
+
+    def close(self):
+        """Stop all workers."""
+        for process, conn in self._workers:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process, conn in self._workers:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self._workers = []
+
+
+_pools = {}
+
+
+def get_pool(name: str = 'default', size: int = DEFAULT_SIZE, initializer=None, initargs=()) -> WorkerPool:
+    """
+    Return the named pool, creating it on first use (cold start) only.
+    """
+    pool = _pools.get(name)
+    if pool is None:
+        logger.info("Starting worker pool %r with %d processes", name, size)
+        pool = _pools[name] = WorkerPool(size, initializer, initargs)
+    return pool
+
+
+def chunked(items: list, size: int) -> list:
+    return [items[i:i + size] for i in range(0, len(items), size)]
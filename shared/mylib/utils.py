@@ -9,4 +9,10 @@ def my_function_ml_procs(num, conn):
     except Exception as e:
         conn.send({"error": str(e)})
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+
+def my_function_ml_batch(nums):
+    # Pool-friendly variant of my_function_ml_procs: one task per chunk,
+    # results returned instead of sent over a dedicated pipe
+    return [{"input": num, "output": num * 2} for num in nums]
@@ -0,0 +1,39 @@
+"""
+Shared fixtures: mylib and the bench's local DynamoDB/SQS stand-in are
+imported from the source tree, and boto3 is pointed at a fresh stand-in per
+test.
+"""
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(REPO_ROOT, "shared"), os.path.join(REPO_ROOT, "bench")]
+
+from local_aws import LocalAWS  # noqa: E402
+
+
+@pytest.fixture
+def local_aws(monkeypatch):
+    """Factory: start a LocalAWS(**kwargs) and route boto3 to it for the test."""
+    started = []
+
+    def start(**kwargs) -> LocalAWS:
+        service = LocalAWS(**kwargs).start()
+        started.append(service)
+        for key, value in service.env().items():
+            monkeypatch.setenv(key, value)
+        return service
+
+    yield start
+    for service in started:
+        service.stop()
+
+
+@pytest.fixture(autouse=True)
+def fresh_bulk_client(monkeypatch):
+    """bulk_writer caches its client; each test gets one for its own stand-in."""
+    from mylib import bulk_writer
+    monkeypatch.setattr(bulk_writer, "_client", None)
+    monkeypatch.setattr(bulk_writer, "_key_names", {})
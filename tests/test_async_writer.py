@@ -0,0 +1,86 @@
+"""async_writer.write_items against the local stand-in, compared with bulk_writer."""
+import pytest
+
+pytest.importorskip("aiobotocore")
+
+from mylib import async_writer, bulk_writer  # noqa: E402
+
+TABLE = "Users"
+
+
+@pytest.fixture(autouse=True)
+def fresh_async_client():
+    yield
+    async_writer._close_client()
+
+
+def users(count: int) -> list:
+    return [{"id": f"user-{i}", "name": f"User {i}", "email": f"user-{i}@example.com"} for i in range(count)]
+
+
+def test_writes_all_items(local_aws):
+    service = local_aws()
+    service.create_table(TABLE)
+
+    result = async_writer.write_items(TABLE, users(120))
+
+    assert result["total"] == 120
+    assert result["succeeded"] == 120
+    assert result["failed"] == 0
+    assert result["failed_items"] == []
+    assert len(service.tables[TABLE].items) == 120
+
+
+def test_recovers_from_throttling(local_aws, monkeypatch):
+    monkeypatch.setattr(bulk_writer, "BASE_BACKOFF", 0.01)
+    service = local_aws(write_capacity=200)
+    service.create_table(TABLE)
+
+    result = async_writer.write_items(TABLE, users(300), max_in_flight=8)
+
+    assert result["succeeded"] == 300
+    assert result["throttles"] > 0
+    assert len(service.tables[TABLE].items) == 300
+
+
+def test_failure_shape_matches_bulk_writer(local_aws, monkeypatch):
+    # one attempt against a nearly empty token bucket: most items stay unprocessed
+    monkeypatch.setattr(bulk_writer, "MAX_ATTEMPTS", 1)
+    items = users(100) + [{"id": "float", "score": 1.5}]  # floats do not serialize
+
+    service = local_aws(write_capacity=10)
+    service.create_table(TABLE)
+    threaded = bulk_writer.write_items(TABLE, items, max_workers=4)
+    service.stop()
+
+    service = local_aws(write_capacity=10)
+    service.create_table(TABLE)
+    asynchronous = async_writer.write_items(TABLE, items, max_in_flight=4)
+
+    assert asynchronous.keys() == threaded.keys()
+    for result in (threaded, asynchronous):
+        assert result["total"] == len(items)
+        assert result["succeeded"] + result["failed"] == len(items)
+        assert 0 < result["succeeded"] < len(items)
+        assert all(failure.keys() == {"index", "id", "error"} for failure in result["failed_items"])
+        last = result["failed_items"][-1]
+        assert (last["index"], last["id"]) == (100, "float")
+        assert last["error"].startswith("SerializationError")
+
+    reasons = {failure["error"] for failure in asynchronous["failed_items"][:-1]}
+    assert reasons == {failure["error"] for failure in threaded["failed_items"][:-1]}
+    assert reasons == {"throttled: retries exhausted"}
+
+
+def test_rejected_batch_is_bisected_like_bulk_writer(local_aws):
+    service = local_aws()
+    service.create_table("Orders", "ddw_key", "recordTypeId")
+    items = [{"ddw_key": f"k{i}", "recordTypeId": "1"} for i in range(25)]
+    items[5] = {"ddw_key": "k5"}
+
+    result = bulk_writer.write_items("Orders", items, key_attr="ddw_key", key_attrs=["ddw_key"],
+                                     writer=async_writer.write_requests)
+
+    assert result["succeeded"] == 24
+    assert [failure["index"] for failure in result["failed_items"]] == [5]
+    assert len(service.tables["Orders"].items) == 24
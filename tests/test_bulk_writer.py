@@ -0,0 +1,116 @@
+"""AIMDLimiter and the threaded bulk writer."""
+import threading
+
+from mylib import bulk_writer
+from mylib.bulk_writer import AIMDLimiter
+
+TABLE = "Users"
+
+
+def users(count: int) -> list:
+    return [{"id": f"user-{i}", "name": f"User {i}"} for i in range(count)]
+
+
+def test_limit_grows_additively_on_clean_batches():
+    limiter = AIMDLimiter(initial=2, maximum=16)
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 3  # +1/limit per clean batch: 2 -> 2.5 -> 2.9 -> 3.24
+    for _ in range(200):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 16
+    assert limiter.peak == 16
+
+
+def test_throttle_halves_limit_once_per_cooldown():
+    limiter = AIMDLimiter(initial=16, maximum=16, cooldown=60)
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(throttled=True)
+    assert limiter.limit == 8  # later throttles are the same congestion event
+    assert limiter.throttles == 3
+
+
+def test_limit_never_drops_below_minimum():
+    limiter = AIMDLimiter(initial=4, minimum=2, cooldown=0)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(throttled=True)
+    assert limiter.limit == 2
+
+
+def test_acquire_blocks_at_limit():
+    limiter = AIMDLimiter(initial=1)
+    limiter.acquire()
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (limiter.acquire(), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.1)
+    limiter.release()
+    assert acquired.wait(1)
+    waiter.join()
+
+
+def test_write_items_recovers_from_throttling(local_aws, monkeypatch):
+    monkeypatch.setattr(bulk_writer, "BASE_BACKOFF", 0.01)
+    service = local_aws(write_capacity=200)
+    service.create_table(TABLE)
+
+    result = bulk_writer.write_items(TABLE, users(300))
+
+    assert result["succeeded"] == 300
+    assert result["throttles"] > 0
+    assert len(service.tables[TABLE].items) == 300
+
+
+def test_connection_errors_do_not_raise_the_limit(local_aws, monkeypatch):
+    monkeypatch.setattr(bulk_writer, "MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(bulk_writer, "BASE_BACKOFF", 0.001)
+    local_aws().stop()  # the endpoint now refuses connections
+
+    result = bulk_writer.write_items(TABLE, users(150), key_attrs=["id"], initial_concurrency=2)
+
+    assert result["failed"] == 150
+    assert result["peak_concurrency"] == 2
+
+
+def test_item_missing_a_key_attribute_fails_alone(local_aws):
+    service = local_aws()
+    service.create_table("Orders", "ddw_key", "recordTypeId")
+    items = [{"ddw_key": "x", "recordTypeId": "1"}, {"ddw_key": "x"}]
+
+    result = bulk_writer.write_items("Orders", items, key_attr="ddw_key")
+
+    assert (result["succeeded"], result["failed"]) == (1, 1)
+    assert result["failed_items"][0]["index"] == 1
+    assert result["failed_items"][0]["error"].startswith("ValidationException")
+    assert len(service.tables["Orders"].items) == 1
+
+
+def test_repeated_keys_are_written_once_last_wins(local_aws):
+    service = local_aws()
+    service.create_table(TABLE)
+    items = users(30) + [{"id": "user-3", "name": "Renamed"}]
+
+    result = bulk_writer.write_items(TABLE, items)
+
+    assert (result["succeeded"], result["failed"]) == (31, 0)
+    assert len(service.tables[TABLE].items) == 30
+    assert service.tables[TABLE].get({"id": {"S": "user-3"}})["name"] == {"S": "Renamed"}
+
+
+def test_rejected_batch_is_bisected_down_to_the_bad_item(local_aws):
+    service = local_aws()
+    service.create_table("Orders", "ddw_key", "recordTypeId")
+    items = [{"ddw_key": f"k{i}", "recordTypeId": "1"} for i in range(25)]
+    items[17] = {"ddw_key": "k17"}
+
+    # a wrong key schema lets the bad item through to DynamoDB, which rejects the batch
+    result = bulk_writer.write_items("Orders", items, key_attr="ddw_key", key_attrs=["ddw_key"])
+
+    assert result["succeeded"] == 24
+    assert [(failure["index"], failure["ddw_key"]) for failure in result["failed_items"]] == [(17, "k17")]
+    assert result["failed_items"][0]["error"].startswith("ValidationException")
+    assert len(service.tables["Orders"].items) == 24
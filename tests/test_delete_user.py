@@ -0,0 +1,99 @@
+"""Bulk delete in delete_user and bulk_writer.delete_keys on a hash+range table."""
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+from events import api_gateway_event
+from mylib import bulk_writer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda"))
+
+TABLE = "UsersDataDefination"
+
+
+def seed(service, partitions: dict):
+    for partition, count in partitions.items():
+        for i in range(count):
+            service.tables[TABLE].put({"ddw_key": {"S": partition}, "recordTypeId": {"S": f"R#{i}"}})
+
+
+def remaining(service) -> int:
+    return len(service.tables[TABLE].items)
+
+
+def invoke(delete_user, body) -> tuple:
+    response = delete_user.lambda_handler(api_gateway_event(body, method="DELETE", path="/user/bulk"), None)
+    return response["statusCode"], json.loads(response.get("body") or "null")
+
+
+@pytest.fixture
+def setup(local_aws, monkeypatch):
+    def start(**kwargs):
+        service = local_aws(**kwargs)
+        service.create_table(TABLE, "ddw_key", "recordTypeId")
+        monkeypatch.setenv("TABLE_NAME", TABLE)
+        # the handler binds its table at import; rebind it to this test's stand-in
+        module = importlib.reload(sys.modules["delete_user"]) if "delete_user" in sys.modules \
+            else importlib.import_module("delete_user")
+        return service, module
+    return start
+
+
+def test_partition_purge_pages_through_the_query(setup, monkeypatch):
+    service, delete_user = setup()
+    monkeypatch.setattr(delete_user, "QUERY_PAGE_SIZE", 3)
+    seed(service, {"u1": 10, "u2": 2})
+
+    status, body = invoke(delete_user, {"partition_key": "u1"})
+
+    assert status == 200
+    assert (body["requested"], body["processed"], body["failed"]) == (10, 10, 0)
+    assert service.request_counts["Query"] == 4  # 3 + 3 + 3 + 1
+    assert remaining(service) == 2
+
+
+@pytest.mark.parametrize("body", [
+    {"keys": "u1"},
+    {"keys": [{"ddw_key": "u1"}]},
+    {"keys": [{"ddw_key": "u1", "recordTypeId": "R#0", "extra": 1}]},
+    {"partition_key": None},
+    {"partition_key": {"S": "u1"}},
+    {},
+])
+def test_invalid_requests_get_400(setup, body):
+    service, delete_user = setup()
+    seed(service, {"u1": 2})
+
+    status, _ = invoke(delete_user, body)
+
+    assert status == 400
+    assert remaining(service) == 2
+
+
+def test_duplicate_keys_are_counted_and_sent_once(setup):
+    service, delete_user = setup()
+    seed(service, {"u1": 3})
+    keys = [{"ddw_key": "u1", "recordTypeId": f"R#{i}"} for i in (0, 1, 1, 2, 0)]
+    keys.append({"ddw_key": "u1", "recordTypeId": "R#missing"})
+
+    status, body = invoke(delete_user, {"keys": keys})
+
+    assert status == 200
+    assert (body["requested"], body["duplicates"], body["processed"], body["failed"]) == (6, 2, 4, 0)
+    assert remaining(service) == 0
+
+
+def test_throttled_delete_recovers_through_unprocessed_retries(setup, monkeypatch):
+    monkeypatch.setattr(bulk_writer, "BASE_BACKOFF", 0.01)
+    service, _ = setup(write_capacity=50)
+    seed(service, {"u1": 150})
+    keys = [{"ddw_key": "u1", "recordTypeId": f"R#{i}"} for i in range(150)]
+
+    result = bulk_writer.delete_keys(TABLE, keys)
+
+    assert (result["requested"], result["processed"], result["failed"]) == (150, 150, 0)
+    assert result["throttles"] > 0
+    assert remaining(service) == 0
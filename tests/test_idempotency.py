@@ -0,0 +1,104 @@
+"""IdempotencyStore claim / replay / expiry against the local stand-in."""
+import time
+
+import pytest
+
+from mylib.idempotency import (
+    IdempotencyInProgress, IdempotencyKeyReused, IdempotencyStore, deterministic_id, payload_hash,
+)
+
+TABLE = "Idempotency"
+
+
+@pytest.fixture
+def service(local_aws):
+    service = local_aws()
+    service.create_table(TABLE)
+    return service
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return {"statusCode": 202, "call": self.calls}
+
+
+def test_first_run_executes_and_replays_return_stored_response(service):
+    store, work = IdempotencyStore(TABLE), Counter()
+
+    assert store.run("req#1", {"a": 1}, work) == ({"statusCode": 202, "call": 1}, False)
+    assert store.run("req#1", {"a": 1}, work) == ({"statusCode": 202, "call": 1}, True)
+    assert work.calls == 1
+    record = service.tables[TABLE].get({"id": {"S": "req#1"}})
+    assert record["status"] == {"S": "COMPLETED"}
+
+
+def test_replay_from_table_on_another_container(service):
+    work = Counter()
+    IdempotencyStore(TABLE).run("req#1", {"a": 1}, work)
+
+    # a second store has an empty local cache, so the answer comes from DynamoDB
+    assert IdempotencyStore(TABLE).run("req#1", {"a": 1}, work) == ({"statusCode": 202, "call": 1}, True)
+    assert work.calls == 1
+
+
+def test_same_key_different_payload_is_rejected(service):
+    IdempotencyStore(TABLE).run("req#1", {"a": 1}, Counter())
+
+    with pytest.raises(IdempotencyKeyReused):
+        IdempotencyStore(TABLE).run("req#1", {"a": 2}, Counter())
+
+
+def test_unfinished_claim_blocks_until_it_expires(service):
+    in_progress = {
+        "id": {"S": "req#1"},
+        "status": {"S": "IN_PROGRESS"},
+        "payload_hash": {"S": payload_hash({"a": 1})},
+        "expiration": {"N": str(int(time.time()) + 60)},
+    }
+    service.tables[TABLE].put(dict(in_progress))
+    with pytest.raises(IdempotencyInProgress):
+        IdempotencyStore(TABLE).run("req#1", {"a": 1}, Counter())
+
+    # a crashed claim expires and the request can run again
+    service.tables[TABLE].put({**in_progress, "expiration": {"N": str(int(time.time()) - 1)}})
+    work = Counter()
+    assert IdempotencyStore(TABLE).run("req#1", {"a": 1}, work)[1] is False
+    assert work.calls == 1
+
+
+def test_completed_record_expires_after_ttl(service):
+    work = Counter()
+    IdempotencyStore(TABLE, ttl_seconds=-1).run("req#1", {"a": 1}, work)
+
+    assert IdempotencyStore(TABLE).run("req#1", {"a": 1}, work) == ({"statusCode": 202, "call": 2}, False)
+
+
+def test_failed_work_releases_the_claim(service):
+    store = IdempotencyStore(TABLE)
+
+    def fail():
+        raise RuntimeError("write failed")
+
+    with pytest.raises(RuntimeError):
+        store.run("req#1", {"a": 1}, fail)
+    assert not service.tables[TABLE].items
+    assert store.run("req#1", {"a": 1}, Counter())[1] is False
+
+
+def test_cache_only_store_dedupes_without_a_table():
+    store, work = IdempotencyStore(None), Counter()
+
+    store.run("req#1", {"a": 1}, work)
+    assert store.run("req#1", {"a": 1}, work)[1] is True
+    assert work.calls == 1
+
+
+def test_deterministic_id_depends_on_key_and_content():
+    user = {"name": "a", "email": "a@example.com"}
+    assert deterministic_id("k1", user) == deterministic_id("k1", dict(reversed(list(user.items()))))
+    assert deterministic_id("k1", user) != deterministic_id("k2", user)
+    assert deterministic_id(None, user) != deterministic_id("k1", user)
@@ -0,0 +1,121 @@
+"""Metrics: the hot-key sketch, DynamoDB instrumentation and EMF output."""
+import json
+from decimal import Decimal
+
+import boto3
+import pytest
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from mylib.metrics import MAX_VALUES_PER_METRIC, Metrics, SpaceSaving
+
+TABLE = "Users"
+
+
+def emitted(capsys) -> list:
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+
+
+def test_space_saving_evicts_the_smallest_counter():
+    sketch = SpaceSaving(capacity=2)
+    for key in ("a", "a", "a", "b", "c"):
+        sketch.add(key)
+
+    # "c" takes over "b"'s counter, inheriting its count as the error bound
+    assert sketch.top() == [
+        {"key": "a", "count": 3, "error": 0},
+        {"key": "c", "count": 2, "error": 1},
+    ]
+
+
+def test_space_saving_decay_halves_and_drops_zeroes():
+    sketch = SpaceSaving()
+    sketch.add("hot", 9)
+    sketch.add("cold")
+    sketch.decay()
+    assert sketch.top() == [{"key": "hot", "count": 4, "error": 0}]
+
+
+def test_hot_keys_accumulate_across_invocations_until_reported(capsys):
+    metrics = Metrics(hot_key_interval=3600)
+
+    @metrics.handler
+    def handler(key):
+        metrics.add_partition_key(key)
+        return {"statusCode": 200}
+
+    for key in ("hot", "hot", "cold", Decimal("7"), b"raw"):
+        handler(key)
+    assert not any("HotPartitions" in doc for doc in emitted(capsys))
+
+    metrics.flush(report_hot_keys=True)
+    hot = emitted(capsys)[0]["HotPartitions"]
+    assert hot[0] == {"key": "hot", "count": 2, "error": 0}
+    assert {entry["key"] for entry in hot} == {"hot", "cold", "7", "b'raw'"}
+
+
+def test_handler_counts_errors_for_raised_and_returned_failures(capsys):
+    metrics = Metrics()
+    responses = iter([{"statusCode": 200}, {"statusCode": 404}, {"statusCode": 502}, "Done", "Error"])
+
+    @metrics.handler
+    def handler():
+        return next(responses)
+
+    @metrics.handler
+    def crashing():
+        raise RuntimeError("boom")
+
+    for _ in range(5):
+        handler()
+    with pytest.raises(RuntimeError):
+        crashing()
+
+    documents = emitted(capsys)
+    assert len(documents) == 6  # one line per invocation
+    assert [doc.get("Errors", 0) for doc in documents] == [0, 0, 1, 0, 1, 1]
+    assert documents[0]["ColdStart"] == 1 and "ColdStart" not in documents[1]
+
+
+def test_full_metric_flushes_early(capsys):
+    metrics = Metrics()
+    for value in range(MAX_VALUES_PER_METRIC + 1):
+        metrics.put("Latency", value, "Milliseconds")
+    metrics.flush()
+
+    documents = emitted(capsys)
+    assert [len(doc["Latency"]) if isinstance(doc["Latency"], list) else 1 for doc in documents] \
+        == [MAX_VALUES_PER_METRIC, 1]
+    assert documents[0]["_aws"]["CloudWatchMetrics"][0]["Metrics"] == [{"Name": "Latency", "Unit": "Milliseconds"}]
+
+
+def test_instrument_records_latency_capacity_and_keys(local_aws, capsys):
+    service = local_aws()
+    service.create_table(TABLE)
+    metrics = Metrics()
+    table = metrics.instrument(boto3.resource("dynamodb"), partition_key="id").Table(TABLE)
+
+    table.put_item(Item={"id": "u1", "name": "a"})
+    response = table.get_item(Key={"id": "u1"})
+    metrics.flush(report_hot_keys=True)
+
+    assert "ConsumedCapacity" in response  # ReturnConsumedCapacity=TOTAL was added
+    document = emitted(capsys)[0]
+    assert document["ConsumedWCU"] == 1.0
+    assert document["ConsumedRCU"] == 0.5  # eventually consistent 4KB read
+    assert "PutItemLatency" in document and "GetItemLatency" in document
+    assert document["HotPartitions"] == [{"key": "u1", "count": 2, "error": 0}]
+
+
+def test_instrument_counts_throttles(local_aws, capsys):
+    service = local_aws(write_capacity=1)
+    service.create_table(TABLE)
+    metrics = Metrics()
+    client = metrics.instrument(boto3.client("dynamodb", config=Config(retries={"max_attempts": 1})))
+
+    client.put_item(TableName=TABLE, Item={"id": {"S": "u1"}})
+    with pytest.raises(ClientError):
+        client.put_item(TableName=TABLE, Item={"id": {"S": "u2"}})
+    metrics.flush()
+
+    assert emitted(capsys)[0]["Throttles"] == 1
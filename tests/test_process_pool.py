@@ -0,0 +1,84 @@
+"""WorkerPool: ordering, error reporting and worker replacement."""
+import os
+import time
+
+import pytest
+
+from mylib.process_pool import WorkerPool, chunked
+
+
+def double(chunk):
+    return [value * 2 for value in chunk]
+
+
+def sleep_then_echo(chunk):
+    delay, value = chunk
+    time.sleep(delay)
+    return value
+
+
+def fail(chunk):
+    raise ValueError(f"bad chunk {chunk}")
+
+
+def die(_chunk):
+    os._exit(1)
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(size=2)
+    yield pool
+    pool.close()
+
+
+def worker_pids(pool) -> set:
+    return {process.pid for process, _ in pool._workers}
+
+
+def test_results_come_back_in_chunk_order(pool):
+    chunks = [(0.05 * (5 - i), i) for i in range(6)]  # later chunks finish first
+    assert pool.map(sleep_then_echo, chunks) == list(range(6))
+    assert pool.map(double, chunked(list(range(7)), 3)) == [[0, 2, 4], [6, 8, 10], [12]]
+
+
+def test_raised_exception_is_reported_for_that_chunk_only(pool):
+    assert pool.map(fail, [1]) == [{"error": "ValueError: bad chunk 1"}]
+    assert pool.map(double, [[1], [2]]) == [[2], [4]]
+
+
+def test_timed_out_worker_is_replaced(pool):
+    before = worker_pids(pool)
+    results = pool.map(sleep_then_echo, [(5, "slow"), (0, "fast")], timeout=0.5)
+
+    assert "timed out" in results[0]["error"]
+    assert results[1] == "fast"
+    assert len(worker_pids(pool) - before) == 1
+    assert pool.map(double, [[1], [2]]) == [[2], [4]]
+
+
+def test_dead_worker_is_replaced(pool):
+    before = worker_pids(pool)
+    results = pool.map(die, [None])
+
+    assert "exited" in results[0]["error"]
+    assert len(worker_pids(pool) - before) == 1
+    assert pool.map(double, [[1], [2]]) == [[2], [4]]
+
+
+def test_worker_killed_between_calls_is_respawned(pool):
+    process, _ = pool._workers[0]
+    process.kill()
+    process.join()
+
+    assert sorted(pool.map(double, [[1], [2], [3]])) == [[2], [4], [6]]
+    assert process.pid not in worker_pids(pool)
+    assert all(process.is_alive() for process, _ in pool._workers)
+
+
+def test_stale_reply_from_an_earlier_call_is_dropped(pool):
+    # simulate a map() that exited with a task still in flight on worker 0
+    pool._workers[0][1].send((next(pool._sequence), sleep_then_echo, (0.2, "stale")))
+
+    assert pool.map(sleep_then_echo, [(0, "a"), (0, "b"), (0, "c")]) == ["a", "b", "c"]
+    assert pool.map(double, [[1], [2]]) == [[2], [4]]